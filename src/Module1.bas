@@ -1,6 +1,12 @@
 Attribute VB_Name = "Module1"
 Option Explicit
 
+' Set USE_PIPELINE_DAEMON to True to send the macros to the resident pipeline daemon (started with "pipeline_daemon.py serve")
+' instead of starting a fresh Python process for every click. Falls back to RunPython if the daemon isn't running.
+Private Const USE_PIPELINE_DAEMON As Boolean = False
+Private Const PYTHON_EXE As String = "python" ' specify this path
+Private Const PIPELINE_DAEMON_SCRIPT As String = "D:\...\personal_finance_data_pipeline\src\pipeline_daemon.py" ' specify this path
+
 Dim otp As String
 Dim tbl As ListObject
 Dim newrow As ListRow
@@ -25,6 +31,28 @@ Private Function PyCredsLoader() As String
     "creds = _get_creds(); "
 End Function
 
+Private Sub RunPipeline(method_name As String, python_source_code As String)
+
+    Dim exit_code As Long
+
+    If USE_PIPELINE_DAEMON Then
+
+        exit_code = CreateObject("WScript.Shell").Run( _
+            """" & PYTHON_EXE & """ """ & PIPELINE_DAEMON_SCRIPT & """ run --workbook """ & ThisWorkbook.FullName & """ --method " & method_name, 0, True)
+
+        ' 0 = done, 1 = the daemon ran the method but it failed, 2 = daemon not running (fall back to RunPython)
+        If exit_code = 0 Then Exit Sub
+        If exit_code = 1 Then
+            MsgBox ("The pipeline daemon reported an error running " & method_name & ". Check the daemon's console.")
+            Exit Sub
+        End If
+
+    End If
+
+    RunPython python_source_code
+
+End Sub
+
 Sub Retrieve_Account_Data_and_Transactions()
 
     Sheets("All FirstBank Transactions").Range("A1").CurrentRegion.Cells.Clear
@@ -34,7 +62,7 @@ Sub Retrieve_Account_Data_and_Transactions()
         "pipeline = PersonalFinanceDataPipeline(creds); " & _
         "pipeline.retrieve_account_data_and_transactions(); "
 
-    RunPython python_source_code
+    RunPipeline "retrieve_account_data_and_transactions", python_source_code
 
     MsgBox ("Done")
 
@@ -46,7 +74,7 @@ Sub Refresh_Income_and_Expenses()
         "pipeline = PersonalFinanceDataPipeline(); " & _
         "pipeline.refresh_income_and_expense_data(); "
 
-    RunPython python_source_code
+    RunPipeline "refresh_income_and_expense_data", python_source_code
 
     MsgBox ("Done")
 
@@ -54,14 +82,29 @@ End Sub
 
 Sub Refresh_Investment_Portfolio()
 
-    Sheets("Personal Investment Portfolio").Range("holdings").Clear
-
     python_source_code = PyBootstrap() & _
         PyCredsLoader() & _
         "pipeline = PersonalFinanceDataPipeline(creds); " & _
         "pipeline.get_investments_v1(); "
 
-    RunPython python_source_code
+    RunPipeline "get_investments_v1", python_source_code
+
+    Sheets("Overview").Range("personal_investment_portfolio").Formula = "=SUM(holdings[Current Equity])+coinbase_usd_cash_bal"
+
+    MsgBox ("Done")
+
+End Sub
+
+Sub Run_All_Refreshes()
+
+    Sheets("All FirstBank Transactions").Range("A1").CurrentRegion.Cells.Clear
+
+    python_source_code = PyBootstrap() & _
+        PyCredsLoader() & _
+        "pipeline = PersonalFinanceDataPipeline(creds); " & _
+        "pipeline.run_all(); "
+
+    RunPipeline "run_all", python_source_code
 
     Sheets("Overview").Range("personal_investment_portfolio").Formula = "=SUM(holdings[Current Equity])+coinbase_usd_cash_bal"
 
@@ -76,7 +119,20 @@ Sub Retrieve_eStatements()
         "pipeline = PersonalFinanceDataPipeline(creds); " & _
         "pipeline.retrieve_estatements(); "
 
-    RunPython python_source_code
+    RunPipeline "retrieve_estatements", python_source_code
+
+    MsgBox ("Done")
+
+End Sub
+
+Sub Retrieve_eStatements_Parallel()
+
+    python_source_code = PyBootstrap() & _
+        PyCredsLoader() & _
+        "pipeline = PersonalFinanceDataPipeline(creds); " & _
+        "pipeline.retrieve_estatements_parallel(); "
+
+    RunPipeline "retrieve_estatements_parallel", python_source_code
 
     MsgBox ("Done")
 
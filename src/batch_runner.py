@@ -0,0 +1,176 @@
+
+# Personal Finance Data Pipeline - Batch Runner
+# Runs the pipeline for several profiles (workbook + creds) side by side in a process pool
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+import importlib
+import traceback
+import argparse
+import json
+import time
+
+try:
+    from .personal_finance_data_pipeline import PersonalFinanceDataPipeline
+except ImportError:
+    from personal_finance_data_pipeline import PersonalFinanceDataPipeline
+
+"""
+Batch Runner
+Runs the Personal Finance Data Pipeline for many household members at once. Each profile names its own workbook, the
+provider of its credentials and the pipeline methods to run. Profiles run in separate processes (each with its own Excel
+instance), so a failure in one profile never stops the others, and a consolidated run summary is produced at the end.
+
+A profile is a dict:
+    {
+        "name": "Brent",
+        "workbook_path": "C:/.../Money Management - Brent.xlsm",
+        "creds_provider": "retrieve_creds:retrieve_creds_for_money_manager",  # "module:function" or a top-level callable
+        "methods": ["retrieve_account_data_and_transactions", "refresh_income_and_expense_data", "get_investments_v1"]
+    }
+
+Functions:
+-----------
+load_creds(creds_provider)
+    Resolves a creds provider ("module:function" string or callable) and returns the creds dict.
+run_profile(profile)
+    Runs the requested pipeline methods for one profile and returns its summary (never raises).
+run_batch(profiles, max_workers)
+    Runs all profiles in a process pool and returns the list of profile summaries.
+format_summary(summaries)
+    Builds a printable consolidated run summary.
+"""
+
+def load_creds(creds_provider):
+
+    # Methods that don't need API access can run without creds
+    if creds_provider is None:
+        return None
+
+    if isinstance(creds_provider, str):
+        module_name, _, func_name = creds_provider.partition(":")
+        creds_provider = getattr(importlib.import_module(module_name), func_name)
+
+    return creds_provider()
+
+def run_profile(profile):
+    """
+    Runs the requested pipeline methods for a single profile. Errors are caught and recorded per method so that
+    one failing method (or profile) doesn't take the rest of the batch down with it.
+
+    Args:
+        profile (dict): Profile with name, workbook_path, creds_provider and methods
+
+    Returns:
+        dict: Summary with the profile name, status, duration and per-method results
+    """
+    summary = {
+        "profile": profile.get("name", profile.get("workbook_path")),
+        "status": "Succeeded",
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "duration": 0.0,
+        "methods": []
+    }
+    profile_start = time.perf_counter()
+
+    try:
+
+        creds = load_creds(profile.get("creds_provider"))
+        pipeline = PersonalFinanceDataPipeline(creds, workbook_path=profile["workbook_path"])
+
+        for method_name in profile.get("methods", []):
+
+            method_start = time.perf_counter()
+            method_result = {"method": method_name, "status": "Succeeded", "duration": 0.0, "error": None}
+
+            try:
+                getattr(pipeline, method_name)()
+            except Exception as e:
+                method_result["status"] = "Failed"
+                method_result["error"] = f"{e}\n{traceback.format_exc()}"
+                summary["status"] = "Failed"
+
+            method_result["duration"] = round(time.perf_counter() - method_start, 2)
+            summary["methods"].append(method_result)
+
+        # Quit this profile's Excel instance now rather than whenever the object gets garbage collected
+        del pipeline
+
+    except Exception as e:
+
+        summary["status"] = "Failed"
+        summary["error"] = f"{e}\n{traceback.format_exc()}"
+
+    summary["duration"] = round(time.perf_counter() - profile_start, 2)
+    return summary
+
+def run_batch(profiles, max_workers=None):
+    """
+    Runs every profile in a process pool.
+
+    Args:
+        profiles (list): List of profile dicts
+        max_workers (int): Number of profiles to run at the same time (defaults to the number of profiles)
+
+    Returns:
+        list: Profile summaries in the same order as the profiles were given
+    """
+    if not profiles:
+        return []
+
+    summaries = [None] * len(profiles)
+    with ProcessPoolExecutor(max_workers=max_workers or len(profiles)) as executor:
+
+        futures = {executor.submit(run_profile, profile): i for i, profile in enumerate(profiles)}
+        for future in as_completed(futures):
+
+            i = futures[future]
+            try:
+                summaries[i] = future.result()
+            except Exception as e:
+                # The worker process itself died (e.g. Excel crashed hard) - still report the profile
+                summaries[i] = {
+                    "profile": profiles[i].get("name", profiles[i].get("workbook_path")),
+                    "status": "Failed",
+                    "duration": 0.0,
+                    "methods": [],
+                    "error": f"{e}\n{traceback.format_exc()}"
+                }
+            print(f"Finished profile {summaries[i]['profile']}: {summaries[i]['status']}")
+
+    return summaries
+
+def format_summary(summaries):
+
+    lines = ["Batch run summary", "-----------------"]
+    for summary in summaries:
+
+        lines.append(f"{summary['profile']}: {summary['status']} ({summary['duration']}s)")
+        for method_result in summary["methods"]:
+            lines.append(f"    {method_result['method']}: {method_result['status']} ({method_result['duration']}s)")
+            if method_result["error"]:
+                lines.append("        " + method_result["error"].strip().splitlines()[0])
+        if summary.get("error"):
+            lines.append("    " + summary["error"].strip().splitlines()[0])
+
+    failed = sum(1 for summary in summaries if summary["status"] != "Succeeded")
+    lines.append(f"{len(summaries) - failed} of {len(summaries)} profiles succeeded")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Run the personal finance data pipeline for several profiles in parallel.")
+    parser.add_argument("profiles_file", help="JSON file holding a list of profiles")
+    parser.add_argument("--workers", type=int, default=None, help="Number of profiles to run at the same time")
+    parser.add_argument("--summary-file", default=None, help="Optional path to write the run summary to as JSON")
+    args = parser.parse_args()
+
+    with open(args.profiles_file, "r") as f:
+        profiles = json.load(f)
+
+    summaries = run_batch(profiles, max_workers=args.workers)
+    print(format_summary(summaries))
+
+    if args.summary_file:
+        with open(args.summary_file, "w") as f:
+            json.dump(summaries, f, indent=4)
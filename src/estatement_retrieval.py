@@ -0,0 +1,220 @@
+
+# Personal Finance Data Pipeline - eStatement Retrieval
+# Isolated browser workers that download FirstBank eStatements, with a checkpoint so interrupted runs resume
+
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium import webdriver
+import traceback
+import threading
+import shutil
+import json
+import time
+import os
+
+"""
+eStatement Retrieval
+The worker side of PersonalFinanceDataPipeline.retrieve_estatements_parallel. Each worker logs in with its own Chrome and
+its own download folder and downloads the statements of a group of accounts that aren't already in the account's "Current
+Statements in OB" folder (or recorded in the run's checkpoint). Nothing here touches the workbook, so the workers can run
+on any thread - and against locally served statement page fixtures by pointing base_url at them (see tests/).
+
+Classes:
+--------
+EStatementCheckpoint
+    Thread-safe, JSON-persisted record of the statements a run has downloaded, so an interrupted run resumes where it stopped.
+
+Functions:
+-----------
+new_estatement_browser(chromedriver_path, download_dir, page_timeout)
+    A Chrome that prints eStatements to PDF in its own download folder.
+wait_for_downloaded_pdf(download_dir, timeout)
+    Waits for the printed PDF to show up in a download folder.
+download_estatements_for_accounts(accounts, export_folders, credentials, chromedriver_path, download_dir, checkpoint, base_url, ...)
+    One eStatement worker: downloads the missing statements of a group of accounts with its own browser.
+"""
+
+ESTATEMENTS_BASE_URL = "https://www.efirstbank.com/"
+ESTATEMENTS_ROW_XPATH = '//*[@id="contentContainer"]/div[2]/div[2]/table/tbody/tr[td[1][normalize-space() = "{account_name}"]]'
+
+class EStatementCheckpoint:
+    """
+    The statements an eStatement retrieval run has downloaded (per account), shared by the workers and written to a JSON
+    file after every statement, so an interrupted run resumes where it stopped. Cleared once a run completes.
+
+    Args:
+        checkpoint_file (str): Path of the JSON checkpoint file
+    """
+
+    def __init__(self, checkpoint_file):
+
+        self.checkpoint_file = checkpoint_file
+        self.lock = threading.Lock()
+        self.state = {"statements": {}}
+        if os.path.exists(checkpoint_file):
+            try:
+                with open(checkpoint_file, "r") as f:
+                    self.state = json.load(f)
+            except (OSError, ValueError):
+                # A corrupt checkpoint just means starting over (statements already on disk are still skipped)
+                pass
+
+    def __save(self):
+
+        os.makedirs(os.path.dirname(self.checkpoint_file), exist_ok=True)
+        tmp_file = self.checkpoint_file + ".tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(self.state, f, indent=1)
+        os.replace(tmp_file, self.checkpoint_file)
+
+    def statement_done(self, account_name, file_name):
+
+        with self.lock:
+            return file_name in self.state["statements"].get(account_name, [])
+
+    def mark_statement_done(self, account_name, file_name):
+
+        with self.lock:
+            self.state["statements"].setdefault(account_name, []).append(file_name)
+            self.__save()
+
+    def clear(self):
+
+        with self.lock:
+            self.state = {"statements": {}}
+            if os.path.exists(self.checkpoint_file):
+                os.remove(self.checkpoint_file)
+
+def new_estatement_browser(chromedriver_path, download_dir, page_timeout=10):
+
+    # Each worker gets its own Chrome with its own download folder, so workers never pick up each other's PDFs
+    settings = {
+        "recentDestinations": [{"id": "Save as PDF", "origin": "local", "account": ""}],
+        "selectedDestinationId": "Save as PDF",
+        "version": 2
+    }
+    options = webdriver.ChromeOptions()
+    options.add_experimental_option("prefs", {
+        "printing.print_preview_sticky_settings.appState": json.dumps(settings),
+        "savefile.default_directory": download_dir,
+        "download.default_directory": download_dir
+    })
+    options.add_argument("--kiosk-printing")
+    browser = webdriver.Chrome(service=Service(chromedriver_path), options=options)
+    browser.implicitly_wait(page_timeout)
+    return browser
+
+def wait_for_downloaded_pdf(download_dir, timeout=30):
+
+    # Chrome writes to a .crdownload file first, so only a finished .pdf counts
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        pdfs = [f for f in os.listdir(download_dir) if f.lower().endswith(".pdf")]
+        if pdfs:
+            return os.path.join(download_dir, pdfs[0])
+        time.sleep(0.5)
+    raise TimeoutError(f"No PDF showed up in {download_dir} after {timeout} seconds")
+
+def download_estatements_for_accounts(accounts, export_folders, credentials, chromedriver_path, download_dir, checkpoint,
+                                      base_url=ESTATEMENTS_BASE_URL, retries=1, download_timeout=30, page_timeout=10):
+    """
+    One eStatement worker: logs in with its own browser and downloads every statement of its accounts that isn't already in
+    the account's "Current Statements in OB" folder (or recorded in the checkpoint). Every statement listed is checked, so
+    statements published since an interrupted run are picked up on resume. A failing statement is retried and then
+    recorded, without stopping the rest.
+
+    Args:
+        accounts (list): Account names (as shown on the eStatements page) this worker handles
+        export_folders (dict): Account name -> "Current Statements in OB" folder
+        credentials (tuple): (user id, password)
+        chromedriver_path (str): Path of chromedriver
+        download_dir (str): This worker's own download folder
+        checkpoint (EStatementCheckpoint): Shared progress of the run
+        base_url (str): Online banking start page
+        retries (int): Retries per statement
+        download_timeout (float): Seconds to wait for each printed PDF
+        page_timeout (float): Seconds to wait for page elements to show up
+
+    Returns:
+        dict: Account name -> {"downloaded": int, "skipped": int, "failed": [(statement date, error)]}
+    """
+    summary = {account_name: {"downloaded": 0, "skipped": 0, "failed": []} for account_name in accounts}
+
+    os.makedirs(download_dir, exist_ok=True)
+    for f in os.listdir(download_dir):
+        os.remove(os.path.join(download_dir, f))
+
+    browser = new_estatement_browser(chromedriver_path, download_dir, page_timeout)
+    try:
+
+        # Login to OB and navigate to the eStatements
+        browser.get(base_url)
+        browser.find_element(By.ID, 'userId').send_keys(credentials[0])
+        browser.find_element(By.ID, 'password').send_keys(credentials[1])
+        browser.find_element(By.ID, 'logIn').click()
+        browser.find_element(By.XPATH, '//*[@id="obTab"]/a').click()
+        browser.find_element(By.LINK_TEXT, 'eStatements').click()
+        statements_tab = browser.current_window_handle
+
+        for account_name in accounts:
+
+            row_xpath = ESTATEMENTS_ROW_XPATH.format(account_name=account_name)
+            statement_dates = [
+                option.get_attribute("value") for option in browser.find_elements(By.XPATH, row_xpath + "/td[3]/select/option")
+            ]
+
+            for statement_date in statement_dates:
+
+                file_name = statement_date.replace("/", "-") + ".pdf"
+                export_file = os.path.join(export_folders[account_name], file_name)
+                if os.path.exists(export_file) or checkpoint.statement_done(account_name, file_name):
+                    summary[account_name]["skipped"] += 1
+                    continue
+
+                for attempt in range(retries + 1):
+                    try:
+
+                        # Select the statement date and open the eStatement (it shows up in a new tab)
+                        browser.find_element(By.XPATH, f'{row_xpath}/td[3]/select/option[@value = "{statement_date}"]').click()
+                        browser.find_element(By.XPATH, row_xpath + "/td[4]/div/input").click()
+                        statement_tab = [handle for handle in browser.window_handles if handle != statements_tab][0]
+                        browser.switch_to.window(statement_tab)
+                        browser.find_element(By.TAG_NAME, "embed")
+
+                        # Print the page to pdf and move it into place (under a temporary name first, so an interrupted
+                        # move never leaves a partial file that would be skipped next time)
+                        browser.execute_script("window.print();")
+                        downloaded_pdf = wait_for_downloaded_pdf(download_dir, download_timeout)
+                        shutil.move(downloaded_pdf, export_file + ".part")
+                        os.replace(export_file + ".part", export_file)
+                        checkpoint.mark_statement_done(account_name, file_name)
+                        summary[account_name]["downloaded"] += 1
+                        break
+
+                    except Exception as e:
+                        if attempt == retries:
+                            summary[account_name]["failed"].append((statement_date, f"{e}\n{traceback.format_exc()}"))
+                        else:
+                            print(f"  {account_name} {statement_date} failed (attempt {attempt + 1} of {retries + 1}), retrying: {e}")
+
+                    finally:
+                        # Close the statement tab (if it opened) and clear out anything half downloaded
+                        for handle in browser.window_handles:
+                            if handle != statements_tab:
+                                browser.switch_to.window(handle)
+                                browser.close()
+                        browser.switch_to.window(statements_tab)
+                        for f in os.listdir(download_dir):
+                            os.remove(os.path.join(download_dir, f))
+
+            print(f"{account_name}: {summary[account_name]['downloaded']} downloaded, {summary[account_name]['skipped']} skipped, {len(summary[account_name]['failed'])} failed")
+
+        try:
+            browser.find_element(By.XPATH, "//span[@data-i18n = 'main:Log Out']").click()
+        except Exception:
+            pass
+
+    finally:
+        browser.quit()
+
+    return summary
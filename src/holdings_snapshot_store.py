@@ -0,0 +1,202 @@
+
+# Personal Finance Data Pipeline - Holdings Snapshot Store
+# Append-only history of the merged Robinhood + Coinbase holdings, stored as Parquet
+
+from datetime import datetime, date
+import pandas as pd
+import json
+import os
+
+"""
+Holdings Snapshot Store
+get_investments_v1 overwrites the holdings table on every run, so this store keeps every run's merged holdings as a
+timestamped snapshot. Snapshots are written as small Parquet files partitioned by month, and past months are compacted into
+a single file sorted by snapshot time. A JSON manifest lists every snapshot with the file that holds it, so queries only
+open the files that overlap the requested date range and push the time filter down into Parquet.
+
+Layout:
+    <root>/manifest.json
+    <root>/YYYY-MM/<YYYYMMDDTHHMMSS>.parquet    (current month, one file per snapshot)
+    <root>/YYYY-MM/compacted.parquet             (past months)
+
+Classes:
+--------
+HoldingsSnapshotStore
+    append(holdings_df, snapshot_time)      Adds a snapshot (compacting any finished months).
+    equity_over_time(start, end, by, ...)   Equity per symbol (or type) per snapshot over a date range.
+    daily_equity(start, end, by, ...)       Same, resampled to one row per day (last snapshot of the day, gaps carried forward).
+    as_of(when)                             The latest snapshot taken at or before a point in time.
+    compact()                               Merges finished months into one file each.
+"""
+
+SNAPSHOT_COLUMNS = ["Symbol", "Name", "Type", "Quantity", "Current Equity"]
+
+def range_end(end):
+
+    # A date-only end ("2025-02-02" or a date) means the whole day, not midnight
+    end_ts = pd.Timestamp(end)
+    date_only = (isinstance(end, date) and not isinstance(end, datetime)) or (isinstance(end, str) and ":" not in end and end_ts == end_ts.normalize())
+    return end_ts + pd.Timedelta(days=1) - pd.Timedelta(1, "ns") if date_only else end_ts
+
+class HoldingsSnapshotStore:
+
+    def __init__(self, root_dir):
+
+        self.root_dir = root_dir
+        self.manifest_file = os.path.join(root_dir, "manifest.json")
+        self.manifest = self.__load_manifest()
+
+    def __load_manifest(self):
+
+        if not os.path.exists(self.manifest_file):
+            return []
+        with open(self.manifest_file, "r") as f:
+            return json.load(f)
+
+    def __save_manifest(self):
+
+        os.makedirs(self.root_dir, exist_ok=True)
+        tmp_file = self.manifest_file + ".tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(tmp_file, self.manifest_file)
+
+    def append(self, holdings_df, snapshot_time=None):
+        """
+        Adds a snapshot of the holdings.
+
+        Args:
+            holdings_df (pd.DataFrame): Holdings with Symbol, Name, Type, Quantity and Current Equity columns
+            snapshot_time (datetime): When the snapshot was taken (defaults to now)
+
+        Returns:
+            str: Path of the Parquet file the snapshot was written to
+        """
+        snapshot_time = pd.Timestamp(snapshot_time or datetime.now()).floor("s")
+
+        snapshot = holdings_df[SNAPSHOT_COLUMNS].copy()
+        snapshot["Symbol"] = snapshot["Symbol"].astype(str)
+        snapshot["Name"] = snapshot["Name"].astype(str)
+        snapshot["Type"] = snapshot["Type"].astype(str)
+        snapshot["Quantity"] = pd.to_numeric(snapshot["Quantity"], errors="coerce")
+        snapshot["Current Equity"] = pd.to_numeric(snapshot["Current Equity"], errors="coerce")
+        snapshot.insert(0, "snapshot_time", snapshot_time)
+        snapshot.reset_index(drop=True, inplace=True)
+
+        month_dir = os.path.join(self.root_dir, snapshot_time.strftime("%Y-%m"))
+        os.makedirs(month_dir, exist_ok=True)
+        snapshot_file = os.path.join(month_dir, snapshot_time.strftime("%Y%m%dT%H%M%S") + ".parquet")
+        snapshot.to_parquet(snapshot_file, index=False)
+
+        self.manifest.append({
+            "snapshot_time": snapshot_time.isoformat(),
+            "file": os.path.relpath(snapshot_file, self.root_dir),
+            "rows": len(snapshot)
+        })
+        self.__save_manifest()
+
+        # Keep the number of files small so range queries stay fast
+        self.compact(before=snapshot_time.strftime("%Y-%m"))
+
+        return snapshot_file
+
+    def compact(self, before=None):
+        """
+        Merges every month (before the given "YYYY-MM", if any) that still has more than one file into a single
+        compacted.parquet sorted by snapshot time.
+        """
+        files_by_month = {}
+        for entry in self.manifest:
+            files_by_month.setdefault(entry["snapshot_time"][:7], set()).add(entry["file"])
+
+        for month, files in files_by_month.items():
+
+            if (before and month >= before) or len(files) < 2:
+                continue
+
+            month_df = pd.concat([pd.read_parquet(os.path.join(self.root_dir, f)) for f in sorted(files)])
+            month_df.sort_values(["snapshot_time", "Symbol"], inplace=True)
+            compacted_file = os.path.join(month, "compacted.parquet")
+            tmp_file = os.path.join(self.root_dir, compacted_file + ".tmp")
+            month_df.to_parquet(tmp_file, index=False)
+            os.replace(tmp_file, os.path.join(self.root_dir, compacted_file))
+
+            for entry in self.manifest:
+                if entry["snapshot_time"][:7] == month:
+                    entry["file"] = compacted_file
+            self.__save_manifest()
+
+            for f in files:
+                if f != compacted_file:
+                    os.remove(os.path.join(self.root_dir, f))
+
+    def __read(self, start=None, end=None, columns=None):
+
+        start = pd.Timestamp(start) if start is not None else None
+        end = range_end(end) if end is not None else None
+
+        # Only open the files holding snapshots inside the range
+        files = sorted({
+            entry["file"] for entry in self.manifest
+            if (start is None or pd.Timestamp(entry["snapshot_time"]) >= start)
+            and (end is None or pd.Timestamp(entry["snapshot_time"]) <= end)
+        })
+        if not files:
+            return pd.DataFrame(columns=["snapshot_time"] + (columns or SNAPSHOT_COLUMNS))
+
+        filters = []
+        if start is not None:
+            filters.append(("snapshot_time", ">=", start))
+        if end is not None:
+            filters.append(("snapshot_time", "<=", end))
+
+        read_columns = ["snapshot_time"] + columns if columns else None
+        return pd.concat([
+            pd.read_parquet(os.path.join(self.root_dir, f), columns=read_columns, filters=filters or None)
+            for f in files
+        ], ignore_index=True)
+
+    def equity_over_time(self, start=None, end=None, by="Symbol", symbols=None, types=None):
+        """
+        Equity per symbol (or type) for every snapshot in the date range.
+
+        Args:
+            start, end: Date range (inclusive, a date-only end includes the whole day), anything pd.Timestamp accepts
+            by (str): "Symbol" or "Type"
+            symbols (list): Optional symbols to restrict to
+            types (list): Optional types to restrict to (e.g. ["stock", "cryptocurrency"])
+
+        Returns:
+            pd.DataFrame: One row per snapshot time, one column per symbol/type
+        """
+        df = self.__read(start, end, columns=["Symbol", "Type", "Current Equity"])
+        if symbols is not None:
+            df = df[df["Symbol"].isin(symbols)]
+        if types is not None:
+            df = df[df["Type"].isin(types)]
+        if df.empty:
+            return pd.DataFrame()
+        # A symbol/type missing from a snapshot isn't held at that time, so it's 0 there (not a gap to carry forward)
+        return df.pivot_table(index="snapshot_time", columns=by, values="Current Equity", aggfunc="sum").fillna(0).sort_index()
+
+    def daily_equity(self, start=None, end=None, by="Symbol", symbols=None, types=None):
+        """
+        Same as equity_over_time but with one row per day: the last snapshot of each day, with days that have no snapshot
+        carried forward from the previous one (positions that were closed drop to 0 from the first snapshot without them).
+        """
+        equity = self.equity_over_time(start, end, by, symbols, types)
+        if equity.empty:
+            return equity
+        return equity.resample("D").last().ffill()
+
+    def as_of(self, when=None):
+        """
+        Returns the holdings from the latest snapshot taken at or before `when` (defaults to now).
+        """
+        when = pd.Timestamp(when or datetime.now())
+        snapshot_times = [pd.Timestamp(entry["snapshot_time"]) for entry in self.manifest]
+        snapshot_times = [snapshot_time for snapshot_time in snapshot_times if snapshot_time <= when]
+        if not snapshot_times:
+            return pd.DataFrame(columns=["snapshot_time"] + SNAPSHOT_COLUMNS)
+        latest = max(snapshot_times)
+        return self.__read(latest, latest)
@@ -6,19 +6,36 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from dateutil.relativedelta import relativedelta
 from coinbase.wallet.client import Client
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime, timedelta
+from collections import OrderedDict
+from contextlib import nullcontext, contextmanager
 from coinbase.rest import RESTClient
 import robin_stocks.robinhood as rh
 from selenium import webdriver
 import xlwings as xw
 import pandas as pd
 import traceback
+import threading
+import functools
+import hashlib
 import PyPDF2
 import json
 import time
 import os
 import re
 
+try:
+    from .holdings_snapshot_store import HoldingsSnapshotStore
+    from .run_ledger import RunLedger
+    from .transaction_search import TransactionSearchIndex
+    from .estatement_retrieval import EStatementCheckpoint, download_estatements_for_accounts, ESTATEMENTS_BASE_URL
+except ImportError:
+    from holdings_snapshot_store import HoldingsSnapshotStore
+    from run_ledger import RunLedger
+    from transaction_search import TransactionSearchIndex
+    from estatement_retrieval import EStatementCheckpoint, download_estatements_for_accounts, ESTATEMENTS_BASE_URL
+
 """
 Personal Finance Data Pipeline
 This module provides a comprehensive data pipeline for automating personal finance management tasks. It retrieves, processes, and categorizes financial data from 
@@ -34,34 +51,82 @@ assign_credit_debit_ind(amt)
     Assigns 'Credit' if the amount is non-negative, otherwise 'Debit'.
 extract_and_remove_date(description, post_date)
     Extracts a date in ' MM-DD' format from a transaction description and removes it; if not found, uses the provided post_date.
+extract_and_remove_dates(descriptions, post_dates)
+    Vectorized version of extract_and_remove_date over whole columns.
+parse_currency_to_cents(amounts)
+    Vectorized parse of amounts like "$1,234.56", "(12.00)", "-5" or numbers into int64 cents (nullable Int64).
+cents_to_dollars(cents)
+    Converts int64 cents back to float dollars (only done right before writing to Excel).
+with_cents_amounts(df) / with_dollar_amounts(df)
+    Swap a frame's "Amount" (dollars) column for an "Amount Cents" column and back, keeping the column position.
+monthly_fingerprints(txns) / build_monthly_rollup(txns)
+    Per-month change fingerprints, and the month x Account x Description Category x Income or Expense rollup (sum, count, min, max).
+load_upwork_exports(export_folder, cache_dir)
+    Reads a folder of Upwork transaction CSV exports (income types only, needed columns only), deduped and cached by file hash.
+get_workbook_key(workbook_fullname)
+    The key a workbook's persisted state (caches, indexes, history, run ledger entries) is filed under.
+default_income_expense_rules(credit_card_account_name)
+    The built-in (Account, Credit/Debit) -> Income/Expense rules, used when the workbook has no income_expense_rules table.
 check_for_existing_pdf(file_dir)
     Checks if any PDF files exist in the specified directory.
 PDFmerge(pdfs, output_pdf_name)
     Merges a list of PDF files into a single output PDF.
+fetch_paginated_robinhood_data(initial_url, endpoint_name)
+    Fetches all pages of data from a paginated Robinhood endpoint.
+recorded_run(method)
+    Decorator that records each run of a pipeline method (timings, fetch counts, row counts, errors) in the run ledger.
+run_stage_graph(stages, max_workers)
+    Runs a dependency graph of stages, I/O stages concurrently and Excel stages one at a time on the calling thread.
+format_stage_report(report)
+    Builds a printable per-stage timing report, including the critical path.
+normalize_cell_values(values)
+    Normalizes a column of cell values so values written from pandas compare equal to the same values read back from Excel.
+sync_table(sheet, table_name, df, key_cols, sort_col, sort_descending)
+    Updates an existing Excel table in place (append / update / delete by row key) instead of clearing and re-creating it.
 
 Classes:
 --------
+DescriptionCategoryCache
+    A bounded LRU memo of description -> category matches, persisted to disk and invalidated whenever Table1 changes.
 PersonalFinanceDataPipeline
     A comprehensive data pipeline class for managing personal finance data, including retrieving account balances and transactions, 
     processing income and expense data, retrieving investment holdings, and downloading/merging eStatements.
     
     Methods:
     --------
-    __init__(self, creds=None)
-        Initializes the pipeline instance, loads reference data and credentials.
+    __init__(self, creds=None, workbook_path=None, wb=None, table_sync_mode="diff")
+        Initializes the pipeline instance, loads reference data and credentials. Opens workbook_path in its own Excel instance if given.
+        table_sync_mode is "diff" (update the output tables in place) or "rebuild" (clear and re-create them).
+    load_reference_data(self)
+        (Re)loads the reference tables and account names from the Script Control Center & Ref Dta sheet.
+    close_sessions(self)
+        Logs out of / closes any sessions (Robinhood, Chrome, Coinbase) that were kept warm between calls.
     __assign_exclude_ind(self, desc)
         Determines if a transaction description should be excluded from income/expense calculations.
     __categorize_description(self, desc)
-        Categorizes a transaction description based on reference data.
+        Categorizes a transaction description based on reference data (memoized through DescriptionCategoryCache).
     __del__(self)
         Cleans up resources by quitting the Excel application if necessary.
     retrieve_account_data_and_transactions(self)
         Retrieves account balances and transaction data from FirstBank and Robinhood, processes and writes them to Excel.
             -> all time data is being pulled from RH
     refresh_income_and_expense_data(self)
-        Processes transaction data to classify as income or expense, categorizes descriptions, and writes results to Excel.
-    get_investments_v1(self)
-        Retrieves and consolidates investment holdings from Robinhood and Coinbase, and writes them to Excel.
+        Processes transaction data to classify as income or expense, categorizes descriptions, and writes results to Excel
+        (along with the monthly category rollup).
+    search_transactions(self, query, start, end, min_amount, max_amount, accounts, income_or_expense, limit)
+        Searches the transaction history by description substring (indexed), filtered by date range, amount and account.
+    explain_description(self, desc)
+        Shows which Table1 rules, Table2 excludes and Table3 manual overrides match a description.
+    write_description_rule_report(self, min_count=2, sheet_name="Description Rule Report")
+        Writes the uncategorized descriptions by frequency and the Table1 rule coverage to their own sheet.
+    get_investments_v1(self, write_history_sheet=False)
+        Retrieves and consolidates investment holdings from Robinhood and Coinbase, snapshots them to the holdings history and writes them to Excel.
+    write_holdings_history(self, by="Type", start=None, end=None, sheet_name="Holdings History")
+        Writes daily equity per type (or symbol) from the holdings history to its own sheet.
+    run_all(self, max_workers=4, retries=2)
+        Runs a full refresh (account data, income & expenses, investments) as a stage graph with concurrent retrieval.
+    retrieve_estatements_parallel(self, max_workers=4, account_groups=None, base_url=ESTATEMENTS_BASE_URL, retries=1, resume=True)
+        Downloads the missing eStatements with one isolated browser worker per account group, checkpointed and resumable (see estatement_retrieval.py), then merges them.
     retrieve_estatements(self)
         Automates downloading, saving, and merging of eStatements from FirstBank online banking, and logs the process.
 """
@@ -133,6 +198,89 @@ def extract_and_remove_date(description, post_date):
     # If no valid date found in description, use post_date
     return post_date.strftime('%m/%d/%Y'), description
 
+def extract_and_remove_dates(descriptions, post_dates):
+    """
+    Vectorized version of extract_and_remove_date: same rules, but over whole columns instead of row by row.
+    
+    Args:
+        descriptions (pd.Series): Transaction descriptions that may contain a date
+        post_dates (pd.Series): The post dates of the transactions
+    
+    Returns:
+        tuple: (formatted_dates, cleaned_descriptions) as two pd.Series
+    """
+    post_dates = pd.to_datetime(post_dates, errors="coerce")
+
+    # Month and day from the first ' MM-DD' in the description, in the post date's year
+    parts = descriptions.str.extract(r'\s(\d{2})-(\d{2})')
+    month = pd.to_numeric(parts[0])
+    day = pd.to_numeric(parts[1])
+    txn_dates = pd.to_datetime(pd.DataFrame({"year": post_dates.dt.year, "month": month, "day": day}), errors="coerce")
+
+    # A date after the post date is from the previous year (and Feb 29 has no previous year, so fall back to the post date)
+    prior_year = txn_dates > post_dates.dt.normalize()
+    txn_dates = txn_dates.where(~prior_year, txn_dates - pd.DateOffset(years=1))
+    txn_dates = txn_dates.where(~(prior_year & (month == 2) & (day == 29)))
+
+    found = txn_dates.notna() & post_dates.notna()
+    formatted_dates = txn_dates.where(found, post_dates).dt.strftime('%m/%d/%Y').fillna("")
+    cleaned_descriptions = descriptions.where(~found, descriptions.str.replace(r'\bON\s\d{2}-\d{2}\s\d{4}\b', '', regex=True).str.strip())
+
+    return formatted_dates, cleaned_descriptions
+
+def parse_currency_to_cents(amounts):
+    """
+    Parses amounts into integer cents in one vectorized pass. Handles "$1,234.56", "(12.00)" (negative), "-$5", JSON decimal
+    strings and plain numbers. Anything unparseable becomes <NA>.
+    
+    Args:
+        amounts (pd.Series or scalar): Amounts to parse
+    
+    Returns:
+        pd.Series (Int64) of cents, or an int for a scalar
+    """
+    if not isinstance(amounts, pd.Series):
+        return parse_currency_to_cents(pd.Series([amounts])).iloc[0]
+
+    if pd.api.types.is_numeric_dtype(amounts):
+        return (amounts.astype("float64") * 100).round().astype("Int64")
+
+    text = amounts.astype(str).str.strip()
+    negative = text.str.startswith("(") & text.str.endswith(")")
+    dollars = pd.to_numeric(text.str.replace(r'[\$,()\s]', '', regex=True), errors="coerce")
+    cents = (dollars * 100).round()
+    return cents.where(~negative, -cents).astype("Int64")
+
+def cents_to_dollars(cents):
+
+    return cents.astype("float64") / 100
+
+def with_cents_amounts(df, dollars_col="Amount", cents_col="Amount Cents"):
+
+    # Money is carried as int64 cents inside the pipeline (exact comparisons and joins) ...
+    df = df.copy()
+    df.insert(df.columns.get_loc(dollars_col), cents_col, parse_currency_to_cents(df[dollars_col]))
+    return df.drop(columns=dollars_col)
+
+def with_dollar_amounts(df, cents_col="Amount Cents", dollars_col="Amount"):
+
+    # ... and only turned back into dollars when it's written to Excel
+    df = df.copy()
+    df.insert(df.columns.get_loc(cents_col), dollars_col, cents_to_dollars(df[cents_col]))
+    return df.drop(columns=cents_col)
+
+def default_income_expense_rules(credit_card_account_name):
+
+    # Same classification the pipeline has always used; "*" matches any account and an account specific rule wins over it
+    return pd.DataFrame([
+        ("*", "Credit", "Income"),
+        ("*", "Debit", "Expense"),
+        (credit_card_account_name, "Credit", "Expense"),
+        (credit_card_account_name, "Debit", "Income"),
+        ("Robinhood Brokerage", "Credit", "Income"),
+        ("Robinhood Cash Card", "Debit", "Expense")
+    ], columns=["Account", "Direction", "Income or Expense"])
+
 def check_for_existing_pdf(file_dir):
   
     exists_a_pdf = False
@@ -166,7 +314,7 @@ def fetch_paginated_robinhood_data(initial_url, endpoint_name="API endpoint"):
         endpoint_name (str): Name of the endpoint for logging purposes
     
     Returns:
-        dict: Combined response with all results and total count
+        dict: Combined response with all results, total count and number of pages
     """
     all_results = []
     next_url = initial_url
@@ -189,21 +337,502 @@ def fetch_paginated_robinhood_data(initial_url, endpoint_name="API endpoint"):
     print(f"  Total {endpoint_name}: {len(all_results)} records across {page_count} pages")
     return {
         'results': all_results,
-        'count': len(all_results)
+        'count': len(all_results),
+        'pages': page_count
     }
 
+def recorded_run(method):
+
+    # Records every run of a pipeline method in the run ledger. Methods called from within another recorded run
+    # (e.g. refresh_income_and_expense_data inside run_all) are part of that run rather than a run of their own.
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+
+        if self.current_run is not None:
+            return method(self, *args, **kwargs)
+
+        def finish_run(status, error = None):
+            # Only bookkeeping - a ledger that can't be written (locked, disk full, ...) must never fail a run that
+            # succeeded or replace the error of one that didn't
+            try:
+                self.current_run.finish(status, error)
+            except Exception:
+                print("Couldn't record the run in the run ledger:")
+                traceback.print_exc()
+
+        self.current_run = self.run_ledger.start_run(method.__name__, self.workbook_key)
+        try:
+            result = method(self, *args, **kwargs)
+        except Exception as e:
+            finish_run("Failed", f"{e}\n{traceback.format_exc()}")
+            raise
+        else:
+            finish_run("Succeeded")
+        finally:
+            self.current_run = None
+
+        return result
+
+    return wrapper
+
+def run_stage_graph(stages, max_workers=4):
+    """
+    Runs a dependency graph of stages. Stages run as soon as all of their dependencies have finished: regular stages on
+    a thread pool (so independent I/O-bound retrievals overlap) and main_thread stages (anything that touches Excel through
+    COM) one at a time on the calling thread. A stage that still fails after its retries causes its dependents to be skipped,
+    but independent branches keep going.
+    
+    Args:
+        stages (list): Stage dicts with "name", "func" (called with a dict of dependency name -> result) and optionally
+                       "deps" (list of stage names), "retries" (int) and "main_thread" (bool)
+        max_workers (int): Size of the thread pool for the regular stages
+    
+    Returns:
+        dict: "results", "timings" (name -> dict of start, end, attempts, status), "failed" (name -> error) and "skipped"
+    """
+    pending = {stage["name"]: stage for stage in stages}
+    results, timings, failed, skipped = {}, {}, {}, []
+    running = {}
+    graph_start = time.perf_counter()
+
+    def run_with_retry(stage):
+
+        inputs = {dep: results[dep] for dep in stage.get("deps", [])}
+        retries = stage.get("retries", 0)
+        start = time.perf_counter()
+        for attempt in range(retries + 1):
+            try:
+                return True, stage["func"](inputs), start, time.perf_counter(), attempt + 1
+            except Exception as e:
+                if attempt == retries:
+                    return False, f"{e}\n{traceback.format_exc()}", start, time.perf_counter(), attempt + 1
+                print(f"  Stage {stage['name']} failed (attempt {attempt + 1} of {retries + 1}), retrying: {e}")
+                time.sleep(2 ** attempt)
+
+    def record(name, outcome):
+
+        succeeded, value, start, end, attempts = outcome
+        timings[name] = {
+            "start": start - graph_start,
+            "end": end - graph_start,
+            "attempts": attempts,
+            "status": "Succeeded" if succeeded else "Failed"
+        }
+        if succeeded:
+            results[name] = value
+        else:
+            failed[name] = value
+        print(f"  Stage {name} {timings[name]['status'].lower()} in {end - start:.1f}s")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+        while pending or running:
+
+            # Skip anything downstream of a failure
+            for name, stage in list(pending.items()):
+                if any(dep in failed or dep in skipped for dep in stage.get("deps", [])):
+                    skipped.append(name)
+                    del pending[name]
+
+            ready = [stage for stage in pending.values() if all(dep in results for dep in stage.get("deps", []))]
+
+            # Kick off every ready background stage first so they overlap with any Excel work below
+            for stage in ready:
+                if not stage.get("main_thread"):
+                    running[executor.submit(run_with_retry, stage)] = stage["name"]
+                    del pending[stage["name"]]
+
+            main_thread_ready = [stage for stage in ready if stage.get("main_thread")]
+            if main_thread_ready:
+                stage = main_thread_ready[0]
+                del pending[stage["name"]]
+                record(stage["name"], run_with_retry(stage))
+                continue
+
+            if running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record(running.pop(future), future.result())
+            elif pending:
+                raise ValueError(f"Stages with unknown or circular dependencies: {', '.join(pending)}")
+
+    return {"results": results, "timings": timings, "failed": failed, "skipped": skipped, "stages": stages}
+
+def format_stage_report(report):
+
+    timings = report["timings"]
+    deps = {stage["name"]: stage.get("deps", []) for stage in report["stages"]}
+
+    lines = ["Stage timings", "-------------"]
+    for name, timing in sorted(timings.items(), key=lambda item: item[1]["start"]):
+        lines.append(
+            f"{name}: {timing['status']} - started at {timing['start']:.1f}s, took {timing['end'] - timing['start']:.1f}s "
+            f"({timing['attempts']} attempt{'s' if timing['attempts'] != 1 else ''})"
+        )
+    for name in report["skipped"]:
+        lines.append(f"{name}: Skipped (an upstream stage failed)")
+
+    # The critical path ends at the last stage to finish and follows, at each step, whichever dependency finished last
+    if timings:
+        critical_path = [max(timings, key=lambda name: timings[name]["end"])]
+        while True:
+            finished_deps = [dep for dep in deps.get(critical_path[-1], []) if dep in timings]
+            if not finished_deps:
+                break
+            critical_path.append(max(finished_deps, key=lambda dep: timings[dep]["end"]))
+        critical_path.reverse()
+        total = timings[critical_path[-1]]["end"]
+        lines.append(f"Critical path ({total:.1f}s): " + " -> ".join(
+            f"{name} ({timings[name]['end'] - timings[name]['start']:.1f}s)" for name in critical_path
+        ))
+
+    return "\n".join(lines)
+
+def normalize_cell_values(values):
+
+    # Excel turns numeric and date-like strings into numbers and dates on write, so compare everything in one canonical form:
+    # "" for blanks, mm/dd/yyyy for dates, 8 decimals for anything numeric and the stripped text otherwise. Done a column at
+    # a time and once per distinct value, since going cell by cell is what made syncing a large table slow
+    values = values.astype(object)
+    normalized = pd.Series("", index = values.index, dtype = object)
+
+    # Booleans first, since True/False would otherwise be lumped in with 1/0
+    is_bool = values.map(type) == bool
+    normalized[is_bool] = values[is_bool].astype(str)
+
+    present = values.notna() & ~is_bool
+    codes, distinct = pd.factorize(values[present])
+    distinct = pd.Series(distinct, dtype = object)
+    distinct_normalized = pd.Series("", index = distinct.index, dtype = object)
+
+    is_date = distinct.map(type).isin([datetime, pd.Timestamp])
+    distinct_normalized[is_date] = pd.to_datetime(distinct[is_date]).dt.strftime('%m/%d/%Y')
+    text = distinct[~is_date].astype(str).str.strip()
+    numbers = pd.to_numeric(text, errors = "coerce")
+    is_number = numbers.notna()
+    distinct_normalized[text.index] = text.where(~is_number, numbers[is_number].map("{:.8f}".format))
+
+    normalized[present] = distinct_normalized.to_numpy()[codes]
+    return normalized
+
+def sync_table(sheet, table_name, df, key_cols, sort_col=None, sort_descending=True):
+    """
+    Brings an existing Excel table in line with df without deleting and re-creating it, so the table object (and every
+    formula, pivot and structured reference pointing at it) stays in place and only the touched cells recalculate.
+    Rows are paired up by key_cols (plus an occurrence number, so duplicate rows pair one to one); removed rows are
+    deleted, changed rows are rewritten and new rows are appended, each as contiguous blocks rather than cell by cell.
+    
+    Args:
+        sheet (xw.Sheet): Sheet holding the table
+        table_name (str): Name of the Excel table
+        df (pd.DataFrame): The table's new contents (columns must match the table's header)
+        key_cols (list): Columns that identify a row
+        sort_col (str): Optional column to re-sort the table by once rows have been appended
+        sort_descending (bool): Sort order for sort_col
+    
+    Returns:
+        dict: Counts of appended, updated and deleted rows, or None if the table can't be synced in place (caller rebuilds it)
+    """
+    if table_name not in [table.name for table in sheet.tables]:
+        return None
+    table = sheet.tables[table_name]
+
+    header = table.header_row_range.value
+    if list(header) != list(df.columns):
+        return None
+
+    body = table.data_body_range
+    current = pd.DataFrame(body.options(ndim=2).value if body is not None else [], columns=header)
+
+    def normalized(frame):
+        return frame.reset_index(drop=True).apply(normalize_cell_values)
+
+    def row_keys(norm):
+        # key_cols joined, plus an occurrence number so duplicate keys pair up one to one (and the keys are unique)
+        if norm.empty:
+            return pd.Index([], dtype=object)
+        base = norm[key_cols[0]].str.cat([norm[col] for col in key_cols[1:]], sep="\x1f")
+        return pd.Index(base + "\x1f" + base.groupby(base).cumcount().astype(str))
+
+    new_norm = normalized(df)
+    current_norm = normalized(current)
+    new_keys = row_keys(new_norm)
+    current_keys = row_keys(current_norm)
+
+    # Position of every new row in the current table (-1 if it's new), and of every current row in df (-1 if it's gone)
+    current_idx_by_new_i = current_keys.get_indexer(new_keys)
+    deleted = (new_keys.get_indexer(current_keys) == -1).nonzero()[0].tolist()
+    if len(current_keys) and len(deleted) == len(current_keys):
+        # Nothing survives - a table can't be emptied down to zero rows, so let the caller rebuild it
+        return None
+
+    appended = (current_idx_by_new_i == -1).nonzero()[0].tolist()
+    new_idx = (current_idx_by_new_i != -1).nonzero()[0]
+    current_idx = current_idx_by_new_i[new_idx]
+    changed = (new_norm.to_numpy()[new_idx] != current_norm.to_numpy()[current_idx]).any(axis=1)
+    updated = list(zip(current_idx[changed].tolist(), new_idx[changed].tolist()))
+
+    first_row = table.range.row + 1
+    first_col = table.range.column
+    last_col = first_col + len(header) - 1
+    raw_values = df.astype(object).where(pd.notna(df), None).values.tolist()
+
+    def contiguous_blocks(positions):
+        blocks = []
+        for position in positions:
+            if blocks and position == blocks[-1][-1] + 1:
+                blocks[-1].append(position)
+            else:
+                blocks.append([position])
+        return blocks
+
+    # 1) Rewrite changed rows in place (before any deletes shift the row positions)
+    new_i_by_position = dict(updated)
+    for block in contiguous_blocks(sorted(new_i_by_position)):
+        sheet.range((first_row + block[0], first_col)).value = [raw_values[new_i_by_position[position]] for position in block]
+
+    # 2) Delete removed rows, bottom block first so the positions above stay valid
+    for block in reversed(contiguous_blocks(deleted)):
+        sheet.range((first_row + block[0], first_col), (first_row + block[-1], last_col)).delete(shift='up')
+
+    # 3) Append new rows under the table and grow the table over them
+    if appended:
+        append_row = first_row + len(current_keys) - len(deleted)
+        sheet.range((append_row, first_col)).value = [raw_values[new_i] for new_i in appended]
+        table.resize(sheet.range((first_row - 1, first_col), (append_row + len(appended) - 1, last_col)))
+
+    # Keep the table in its usual order now that new rows sit at the bottom (Windows COM)
+    if sort_col and appended:
+        table_sort = table.api.Sort
+        table_sort.SortFields.Clear()
+        table_sort.SortFields.Add(table.api.ListColumns(sort_col).Range, 0, 2 if sort_descending else 1)
+        table_sort.Header = 1
+        table_sort.Apply()
+
+    return {"appended": len(appended), "updated": len(updated), "deleted": len(deleted)}
+
+# Local folder for anything the pipeline persists between runs (caches, etc.)
+PIPELINE_DATA_DIR = os.path.join(os.path.expanduser("~"), ".personal_finance_data_pipeline")
+
+def get_workbook_key(workbook_fullname):
+
+    # The workbook's file name (readable) plus a short hash of its full path, so two workbooks with the same name in
+    # different folders never share state (fullname can also be a OneDrive URL, hence splitting on either slash)
+    name = re.sub(r'\W', '_', os.path.splitext(re.split(r'[\\/]', workbook_fullname)[-1])[0])
+    path_hash = hashlib.sha1(os.path.normcase(workbook_fullname).encode("utf-8")).hexdigest()[:8]
+    return f"{name}_{path_hash}"
+
+ROLLUP_KEY_COLUMNS = ["Month", "Account", "Description Category", "Income or Expense"]
+
+def monthly_fingerprints(txns):
+
+    # Order independent hash of each month's rows - a month only needs re-aggregating when its fingerprint changes
+    row_hashes = pd.util.hash_pandas_object(txns, index=False)
+    return row_hashes.groupby(txns["Month"]).sum().astype(str).to_dict()
+
+def build_monthly_rollup(txns):
+    """
+    Aggregates transactions (Month, Account, Description Category, Income or Expense, Amount Cents) into one row per
+    month x Account x Description Category x Income or Expense with the total, count, min and max in cents.
+    """
+    return txns.groupby(ROLLUP_KEY_COLUMNS, dropna=False)["Amount Cents"].agg(
+        ["sum", "count", "min", "max"]
+    ).reset_index().rename(columns={"sum": "Total Cents", "count": "Count", "min": "Min Cents", "max": "Max Cents"})
+
+UPWORK_INCOME_TYPES = ["Bonus", "Fixed-price", "Hourly", "Expense reimbursement"]
+UPWORK_COLUMNS = ["Date", "Amount $", "Transaction Type", "Transaction Summary"]
+UPWORK_ID_COLUMNS = ["Transaction ID", "Ref ID"]
+
+def load_upwork_exports(export_folder, cache_dir=None, chunksize=50000):
+    """
+    Reads every Upwork transaction CSV export in a folder straight from disk (no pasting into the workbook). Only the needed
+    columns are parsed, income types are filtered chunk by chunk, and each file's parsed result is cached by its content
+    hash so unchanged exports are never parsed twice. Overlapping exports are deduped by transaction id.
+    
+    Args:
+        export_folder (str): Folder holding the Upwork CSV exports
+        cache_dir (str): Where parsed files are cached (defaults to the pipeline's data folder)
+        chunksize (int): Rows per chunk while parsing
+    
+    Returns:
+        pd.DataFrame: Date, Amount $, Transaction Type and Transaction Summary of the income transactions
+    """
+    cache_dir = cache_dir or os.path.join(PIPELINE_DATA_DIR, "upwork_exports_cache")
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # Hashing is cheap next to parsing, but skip even that for files whose size and modified time haven't changed
+    hash_index_file = os.path.join(cache_dir, "file_hashes.json")
+    hash_index = {}
+    if os.path.exists(hash_index_file):
+        with open(hash_index_file, "r") as f:
+            hash_index = json.load(f)
+
+    wanted_columns = set(UPWORK_COLUMNS + UPWORK_ID_COLUMNS)
+    parsed_files = []
+    for file_name in sorted(os.listdir(export_folder)):
+
+        if not file_name.lower().endswith(".csv"):
+            continue
+
+        file_path = os.path.join(export_folder, file_name)
+        file_stat = os.stat(file_path)
+        indexed = hash_index.get(file_path)
+        if indexed and indexed["size"] == file_stat.st_size and indexed["mtime"] == file_stat.st_mtime:
+            file_hash = indexed["hash"]
+        else:
+            with open(file_path, "rb") as f:
+                file_hash = hashlib.sha256(f.read()).hexdigest()
+            hash_index[file_path] = {"size": file_stat.st_size, "mtime": file_stat.st_mtime, "hash": file_hash}
+
+        cache_file = os.path.join(cache_dir, file_hash + ".parquet")
+        if os.path.exists(cache_file):
+            parsed_files.append(pd.read_parquet(cache_file))
+            continue
+
+        chunks = []
+        for chunk in pd.read_csv(file_path, usecols=lambda col: col in wanted_columns, dtype=str, chunksize=chunksize):
+            chunks.append(chunk[chunk["Transaction Type"].isin(UPWORK_INCOME_TYPES)])
+        parsed = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=UPWORK_COLUMNS)
+
+        parsed.to_parquet(cache_file, index=False)
+        parsed_files.append(parsed)
+
+    with open(hash_index_file, "w") as f:
+        json.dump(hash_index, f)
+
+    if not parsed_files:
+        return pd.DataFrame(columns=UPWORK_COLUMNS)
+
+    # Exports overlap (e.g. "last 90 days" pulled every month), so keep each transaction once
+    # (newer exports have a Transaction ID, older ones a Ref ID - rows with neither can't be matched up, so they're all kept)
+    upwork_df = pd.concat(parsed_files, ignore_index=True)
+    transaction_key = pd.Series(pd.NA, index=upwork_df.index, dtype=object)
+    for id_column in UPWORK_ID_COLUMNS:
+        if id_column in upwork_df.columns:
+            transaction_key = transaction_key.fillna(upwork_df[id_column].str.strip().replace("", pd.NA))
+    upwork_df = upwork_df[transaction_key.isna() | ~transaction_key.duplicated()]
+
+    return upwork_df[UPWORK_COLUMNS]
+
+class DescriptionCategoryCache:
+    """
+    Memoizes description -> category matches so rule matching only runs for distinct, unseen descriptions.
+    
+    Entries are kept in LRU order and persisted to a JSON file between runs. The cache is tagged with a hash of
+    the Table1 contents (the rule table) and is thrown away automatically when the rules change.
+    
+    Args:
+        rules (dict): The description substring -> category lookup (Table1)
+        cache_file (str): Path of the JSON file the cache is persisted to
+        max_size (int): Maximum number of descriptions to keep before evicting the least recently used
+    """
+
+    def __init__(self, rules, cache_file=None, max_size=50000):
+
+        self.cache_file = cache_file or os.path.join(PIPELINE_DATA_DIR, "description_category_cache.json")
+        self.max_size = max_size
+        self.rules_version = self.compute_rules_version(rules)
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.load()
+
+    @staticmethod
+    def compute_rules_version(rules):
+
+        # Rule order matters (first match wins), so hash the items in order
+        rules_json = json.dumps([[str(k), str(v)] for k, v in (rules or {}).items()])
+        return hashlib.sha256(rules_json.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def normalize(desc):
+
+        # Matching is case-insensitive, so the upper-cased description is a safe key
+        return str(desc).upper()
+
+    def load(self):
+
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, "r") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            # A corrupt cache file is simply rebuilt
+            return
+        if cached.get("rules_version") != self.rules_version:
+            # Table1 changed since the cache was written, so every entry is stale
+            return
+        for desc, category in cached.get("entries", [])[-self.max_size:]:
+            self.entries[desc] = category
+
+    def save(self):
+
+        # Unique tmp name so pipelines running side by side (batch runner) never write to the same tmp file
+        tmp_file = f"{self.cache_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            with open(tmp_file, "w") as f:
+                json.dump({"rules_version": self.rules_version, "entries": list(self.entries.items())}, f)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            # The cache is only an optimization, so failing to save it must never fail the run
+            print(f"Couldn't save the description category cache ({e}), it will be rebuilt next run")
+            if os.path.exists(tmp_file):
+                try:
+                    os.remove(tmp_file)
+                except OSError:
+                    pass
+
+    def get(self, desc, compute):
+
+        key = self.normalize(desc)
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+        self.misses += 1
+        category = compute(desc)
+        self.entries[key] = category
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return category
+
 class PersonalFinanceDataPipeline:
 
-    def __init__(self, creds = None):
+    def __init__(self, creds = None, workbook_path = None, wb = None, table_sync_mode = "diff"):
+
+        # Only quit Excel on cleanup if this object started (or took over) the Excel app itself
+        self.quit_app_on_exit = False
+
+        # "diff" updates the transactions/holdings tables in place (see sync_table), "rebuild" clears and re-creates them
+        self.table_sync_mode = table_sync_mode
+
+        # If an already open workbook was handed over (e.g. by the pipeline daemon), just use it
+        if wb is not None:
+
+            self.wb = wb
+
+        # If a specific workbook was requested (e.g. by the batch runner), open it in its own Excel instance so that 
+        # pipelines running side by side don't share (or quit) each other's app
+        elif workbook_path:
+
+            self.wb = xw.App(visible = False, add_book = False).books.open(workbook_path)
+            self.quit_app_on_exit = True
 
         # If this class is being instantiated in the VBA source code (ran by the RunPython VBA funct)
-        if __name__ == "personal_finance_data_pipeline.src.personal_finance_data_pipeline":
+        elif __name__ == "personal_finance_data_pipeline.src.personal_finance_data_pipeline":
 
             self.wb = xw.Book.caller()
 
         else:
 
             self.wb = xw.Book("../Money Management - Tracking, Budgeting, Investing, and Saving.xlsm")
+            self.quit_app_on_exit = True
+
+        # Everything persisted for this workbook (under PIPELINE_DATA_DIR, and in the run ledger) is filed under this key
+        self.workbook_key = get_workbook_key(self.wb.fullname)
 
         # Set credential variables if they were passed in
         if creds:
@@ -214,6 +843,37 @@ class PersonalFinanceDataPipeline:
             self.robinhood_p = creds["Robinhood"][1]
             self.coinbase_key_id = creds["Coinbase"][0]
             self.coinbase_key_secret = creds["Coinbase"][1]
+            # Keep a separate RH session file per user so several household members' sessions don't collide
+            self.robinhood_session_name = re.sub(r'\W', '_', self.robinhood_u)
+
+        # Sessions (Robinhood login, Chrome, Coinbase clients) are closed after every method unless they're kept warm 
+        # between calls, which is what the pipeline daemon does
+        self.keep_sessions_warm = False
+        self.robinhood_session_expires_at = None
+        self.robinhood_login_lock = threading.Lock()
+        self.browser = None
+        self.coinbase_clients = None
+
+        # Run history (see run_ledger.py); current_run is set while a pipeline method is running
+        self.run_ledger = RunLedger()
+        self.current_run = None
+
+        # Append-only history of the holdings (one store per workbook so household members' portfolios don't mix)
+        holdings_snapshot_dir = os.path.join(PIPELINE_DATA_DIR, "holdings_snapshots", self.workbook_key)
+        legacy_holdings_snapshot_dir = os.path.join(PIPELINE_DATA_DIR, "holdings_snapshots", re.sub(r'\W', '_', os.path.splitext(self.wb.name)[0]))
+        if not os.path.exists(holdings_snapshot_dir) and os.path.isdir(legacy_holdings_snapshot_dir):
+            # The history can't be re-fetched, so carry over a store that was filed under the bare workbook name
+            os.rename(legacy_holdings_snapshot_dir, holdings_snapshot_dir)
+        self.holdings_snapshot_store = HoldingsSnapshotStore(holdings_snapshot_dir)
+
+        # Search index over the combined transaction history (see transaction_search.py), updated after each refresh
+        self.transaction_search = TransactionSearchIndex(
+            os.path.join(PIPELINE_DATA_DIR, "transaction_search", self.workbook_key)
+        )
+
+        self.load_reference_data()
+
+    def load_reference_data(self):
 
         # Read in reference data from the Script Control Center & Ref Dta sheet in the Money Management Excel workbook
         self.description_category_lookup = self.wb.sheets["Script Control Center & Ref Dta"].range("Table1").options(dict).value # dict
@@ -221,6 +881,13 @@ class PersonalFinanceDataPipeline:
         self.manual_descriptions = self.wb.sheets["Script Control Center & Ref Dta"].range("Table3").options(pd.DataFrame, index = False, header = False).value # dataframe
         self.txn_excludes = self.wb.sheets["Script Control Center & Ref Dta"].range("txn_excludes").options(pd.DataFrame, index = False, header = False).value # dataframe
 
+        # Description -> category memo (invalidated automatically whenever Table1 changes), one per workbook since every
+        # workbook has its own Table1
+        self.description_category_cache = DescriptionCategoryCache(
+            self.description_category_lookup,
+            cache_file = os.path.join(PIPELINE_DATA_DIR, "description_category_cache", self.workbook_key + ".json")
+        )
+
         # Set account names, which come from the Script Control Center & Ref Dta sheet
         self.account1_name = self.wb.sheets["Script Control Center & Ref Dta"].range("Account_1").value
         self.account2_name = self.wb.sheets["Script Control Center & Ref Dta"].range("Account_2").value
@@ -228,6 +895,137 @@ class PersonalFinanceDataPipeline:
         self.account4_name = self.wb.sheets["Script Control Center & Ref Dta"].range("Account_4").value
         self.credit_card_account_name = self.wb.sheets["Script Control Center & Ref Dta"].range("Credit_Card_Account").value
 
+        # (Account, Credit/Debit) -> Income/Expense rules from the income_expense_rules table, if the workbook has one
+        # (a table doesn't show up in wb.names, so look in the sheet's tables too - a named range works as well)
+        ref_data_sheet = self.wb.sheets["Script Control Center & Ref Dta"]
+        if "income_expense_rules" in [table.name for table in ref_data_sheet.tables] + [name.name for name in self.wb.names]:
+            self.income_expense_rules = ref_data_sheet.range("income_expense_rules").options(pd.DataFrame, index = False, header = False).value # dataframe
+            self.income_expense_rules.columns = ["Account", "Direction", "Income or Expense"]
+        else:
+            print("No income_expense_rules table found on the Script Control Center & Ref Dta sheet, using the default income/expense rules")
+            self.income_expense_rules = default_income_expense_rules(self.credit_card_account_name)
+
+        # Folder of Upwork CSV exports, if the workbook points at one (otherwise the pasted-in sheet is used)
+        if "Upwork_Exports_Folder" in [name.name for name in self.wb.names]:
+            self.upwork_exports_folder = self.wb.sheets["Script Control Center & Ref Dta"].range("Upwork_Exports_Folder").value
+        else:
+            self.upwork_exports_folder = None
+
+    def __robinhood_login(self):
+
+        # Locked since run_all fetches from Robinhood on more than one thread
+        with self.robinhood_login_lock:
+
+            # Reuse the current session if it's being kept warm and hasn't expired yet
+            if self.keep_sessions_warm and self.robinhood_session_expires_at and time.time() < self.robinhood_session_expires_at:
+                return
+
+            login_resp = rh.authentication.login(self.robinhood_u, self.robinhood_p, pickle_name = self.robinhood_session_name)
+            # Give the token a minute of slack so it doesn't expire mid-run
+            self.robinhood_session_expires_at = time.time() + float((login_resp or {}).get("expires_in", 86400)) - 60
+
+    @contextmanager
+    def __robinhood_session(self):
+
+        # Logs in (or reuses the warm session) and logs out afterwards unless the session is kept warm. A failed fetch drops
+        # the session, so a retry (or the daemon's next command) logs in again instead of reusing a possibly dead token
+        self.__robinhood_login()
+        try:
+            yield
+        except Exception:
+            self.__invalidate_robinhood_session()
+            raise
+        self.__robinhood_logout()
+
+    def __invalidate_robinhood_session(self):
+
+        with self.robinhood_login_lock:
+            self.robinhood_session_expires_at = None
+
+    def __robinhood_logout(self):
+
+        if not self.keep_sessions_warm:
+            rh.authentication.logout()
+            self.robinhood_session_expires_at = None
+
+    def __get_browser(self, chromedriver_path):
+
+        # Reuse the running Chrome instance if it's being kept warm and is still responsive
+        if self.browser is not None:
+            try:
+                self.browser.current_url
+                return self.browser
+            except Exception:
+                self.browser = None
+
+        service = webdriver.chrome.service.Service(chromedriver_path)
+        browser = webdriver.Chrome(service=service)
+        browser.implicitly_wait(30)
+        if self.keep_sessions_warm:
+            self.browser = browser
+        return browser
+
+    def __release_browser(self, browser):
+
+        if not self.keep_sessions_warm:
+            browser.quit()
+
+    def __discard_browser(self, browser):
+
+        # Used after a failed scrape so that a retry doesn't pick up a half logged in browser
+        try:
+            browser.quit()
+        except Exception:
+            pass
+        if browser is self.browser:
+            self.browser = None
+
+    def __get_coinbase_clients(self):
+
+        if self.coinbase_clients is not None:
+            return self.coinbase_clients
+
+        coinbase_clients = (Client("0", "0"), RESTClient(api_key=self.coinbase_key_id, api_secret=self.coinbase_key_secret))
+        if self.keep_sessions_warm:
+            self.coinbase_clients = coinbase_clients
+        return coinbase_clients
+
+    def close_sessions(self):
+
+        # Log out of / close anything that has been kept warm
+        if self.robinhood_session_expires_at:
+            rh.authentication.logout()
+            self.robinhood_session_expires_at = None
+        if self.browser is not None:
+            try:
+                self.browser.quit()
+            except Exception:
+                pass
+            self.browser = None
+        self.coinbase_clients = None
+
+    def __sync_table(self, sheet, table_name, df, key_cols, sort_col = None):
+
+        if self.table_sync_mode != "diff":
+            return False
+
+        sync_counts = sync_table(sheet, table_name, df, key_cols, sort_col = sort_col)
+        if sync_counts is None:
+            print(f"Table {table_name} can't be synced in place, rebuilding it")
+            return False
+
+        print(f"Synced table {table_name}: {sync_counts['appended']} appended, {sync_counts['updated']} updated, {sync_counts['deleted']} deleted")
+        return True
+
+    def __stage(self, name):
+
+        return self.current_run.stage(name) if self.current_run else nullcontext()
+
+    def __record_rows(self, output, row_count):
+
+        if self.current_run:
+            self.current_run.record_rows(output, row_count)
+
     def __assign_exclude_ind(self, desc):
 
         # how to check if any items w/in a list are in a string
@@ -236,8 +1034,40 @@ class PersonalFinanceDataPipeline:
             truth_val = True
         return(truth_val)
 
+    def __classify_income_expense(self, df):
+
+        # Look up every (Account, Credit_Debit_Ind) pair in the rules at once; an account specific rule wins over the "*" rule
+        # (and for duplicate rules, the last one wins)
+        rules = self.income_expense_rules.drop_duplicates(["Account", "Direction"], keep = "last")
+        account_rules = rules[rules["Account"] != "*"].set_index(["Account", "Direction"])["Income or Expense"]
+        any_account_rules = rules[rules["Account"] == "*"].set_index("Direction")["Income or Expense"]
+        income_expense = pd.Series(
+            account_rules.reindex(pd.MultiIndex.from_arrays([df["Account"], df["Credit_Debit_Ind"]])).values,
+            index = df.index
+        )
+        df["Income or Expense"] = income_expense.fillna(df["Credit_Debit_Ind"].map(any_account_rules))
+
+        # Flip the sign on all amounts to be positive (for credit card txns that show negetive amts)
+        df["Amount Cents"] = df["Amount Cents"].abs()
+
+        # drop these cols "Income_Expense_Exclude","Credit_Debit_Ind"
+        df.drop(["Income_Expense_Exclude","Credit_Debit_Ind"], axis=1, inplace=True)
+
+        # Clean up the description col (remove_visa) and extract transaction dates
+        df["Description"] = df["Description"].str.replace(r'\bVISA \b', '', regex=True)
+        # Convert Post Date to datetime if it isn't already
+        df["Date"] = pd.to_datetime(df["Date"])
+        df["Txn Date"], df["Description"] = extract_and_remove_dates(df["Description"], df["Date"])
+
+        return df
+
     def __categorize_description(self, desc):
 
+        # Only run the rule matching for descriptions that haven't been seen before
+        return self.description_category_cache.get(desc, self.__match_description_category)
+
+    def __match_description_category(self, desc):
+
         # loop through the dict
         for desc_substring in self.description_category_lookup:
             if desc_substring.upper() in desc.upper():
@@ -249,18 +1079,25 @@ class PersonalFinanceDataPipeline:
 
     def __get_upwork_income(self):
         """
-        Retrieves Upwork income data from CSV file and formats it for integration
-        with other transaction data.
+        Retrieves Upwork income data from the Upwork CSV exports (or, if no export folder is set up, the Sole Proprietor
+        Upwork Txns worksheet) and formats it for integration with other transaction data.
         
         Returns:
             pd.DataFrame: Formatted Upwork income transactions
         """
-        # Get the data from the Upwork Txns worksheet and filter for income transactions
-        upwork_df = self.wb.sheets["Sole Proprietor Upwork Txns"].range("A1").expand().options(pd.DataFrame, header=True, index=False).value
-        upwork_income_df = upwork_df[upwork_df["Transaction Type"].isin(["Bonus", "Fixed-price", "Hourly", "Expense reimbursement"])]
+        if self.upwork_exports_folder:
+
+            # Read the Upwork CSV exports directly
+            upwork_income_df = load_upwork_exports(self.upwork_exports_folder)
+
+        else:
+
+            # Get the data from the Upwork Txns worksheet and filter for income transactions
+            upwork_df = self.wb.sheets["Sole Proprietor Upwork Txns"].range("A1").expand().options(pd.DataFrame, header=True, index=False).value
+            upwork_income_df = upwork_df[upwork_df["Transaction Type"].isin(UPWORK_INCOME_TYPES)]
 
-        #subset cols (Date, Amount $, Transaction Type, Transaction Summary)
-        upwork_income_df = upwork_income_df[["Date", "Amount $", "Transaction Type", "Transaction Summary"]]
+            #subset cols (Date, Amount $, Transaction Type, Transaction Summary)
+            upwork_income_df = upwork_income_df[UPWORK_COLUMNS]
 
         # Rename columns 
         upwork_income_df = upwork_income_df.rename(columns={
@@ -285,42 +1122,92 @@ class PersonalFinanceDataPipeline:
         col_order = ["Post Date", "Transaction Date", "Account", "Amount", "Description", "Type", "Income or Expense", "Description Category"]
         upwork_income_df = upwork_income_df[col_order]
 
-        return upwork_income_df
+        return with_cents_amounts(upwork_income_df)
 
     def __del__(self):
 
-        if __name__ != "personal_finance_data_pipeline.src.personal_finance_data_pipeline":
+        if self.quit_app_on_exit:
 
             self.wb.app.quit()
 
+    @recorded_run
     def retrieve_account_data_and_transactions(self): 
 
+        # Each step below is also a stage of the run_all orchestrator, which runs the Robinhood and FirstBank retrievals concurrently
+        with self.__stage("robinhood_fetch"):
+            robinhood_data = self.__fetch_robinhood_account_data()
+        with self.__stage("robinhood_transform"):
+            robinhood_frames = self.__transform_robinhood_account_data(robinhood_data)
+        with self.__stage("firstbank_scrape"):
+            firstbank_data = self.__scrape_firstbank_account_data(self.__get_chromedriver_path())
+        with self.__stage("firstbank_transform"):
+            firstbank_txns_df = self.__transform_firstbank_transactions(firstbank_data)
+        with self.__stage("write_account_data"):
+            self.__write_account_data(robinhood_frames, firstbank_data, firstbank_txns_df)
+
+    def __fetch_robinhood_account_data(self):
+
         # **************************************************************************************************************************************************
         # Data retrieval from Robinhood (account balances, interest income, cash card transactions, and direct deposits) - Using Robin Stocks Unofficial API
         # **************************************************************************************************************************************************
 
         # ***********************  Robinhood API calls for Data  ***********************
 
-        rh.authentication.login(self.robinhood_u, self.robinhood_p) 
-
-        # Balances
-        rh_cash_available_for_withdrawal = rh.profiles.load_account_profile()["cash_available_for_withdrawal"]
-        rhy_accounts_json_resp = fetch_paginated_robinhood_data("https://bonfire.robinhood.com/rhy/accounts/", "RHY accounts")
-
-        # RH Spending Account Txns - Card Txns, Card Rewards, Direct Deposits, and ACH transfers
-        print("Fetching Robinhood transaction data...")
-        card_settled_transactions_json_resp = fetch_paginated_robinhood_data("https://minerva.robinhood.com/cards/settled_transactions/", "card settled transactions")
-        unified_transfers_json_resp = fetch_paginated_robinhood_data("https://bonfire.robinhood.com/paymenthub/unified_transfers/", "unified transfers")
-        card_rewards_json_resp = fetch_paginated_robinhood_data("https://api.robinhood.com/pluto/historical_activities/?page_size=1000", "card rewards")
-        # subscriptions
-        subscription_data = fetch_paginated_robinhood_data("https://api.robinhood.com/subscription/subscription_fees", "subscription fees")
+        with self.__robinhood_session():
+
+            # Balances
+            rh_cash_available_for_withdrawal = rh.profiles.load_account_profile()["cash_available_for_withdrawal"]
+            rhy_accounts_json_resp = fetch_paginated_robinhood_data("https://bonfire.robinhood.com/rhy/accounts/", "RHY accounts")
+
+            # RH Spending Account Txns - Card Txns, Card Rewards, Direct Deposits, and ACH transfers
+            print("Fetching Robinhood transaction data...")
+            card_settled_transactions_json_resp = fetch_paginated_robinhood_data("https://minerva.robinhood.com/cards/settled_transactions/", "card settled transactions")
+            unified_transfers_json_resp = fetch_paginated_robinhood_data("https://bonfire.robinhood.com/paymenthub/unified_transfers/", "unified transfers")
+            card_rewards_json_resp = fetch_paginated_robinhood_data("https://api.robinhood.com/pluto/historical_activities/?page_size=1000", "card rewards")
+            # subscriptions
+            subscription_data = fetch_paginated_robinhood_data("https://api.robinhood.com/subscription/subscription_fees", "subscription fees")
+
+            # RH Investment Income & Rewards (RH boost income, as well) 
+            brokerage_interest_income_json_resp = fetch_paginated_robinhood_data("https://api.robinhood.com/accounts/sweeps", "brokerage interest income")
+            rh_dividends = pd.DataFrame(rh.get_dividends())
+            rh_boost_income_json_resp = fetch_paginated_robinhood_data("https://bonfire.robinhood.com/gold/deposit_boost_paid_payouts/", "boost income")
+
+        # Keep track of how much each endpoint returned (a sudden drop usually means a partial fetch)
+        if self.current_run:
+            for endpoint, resp in {
+                "RHY accounts": rhy_accounts_json_resp,
+                "card settled transactions": card_settled_transactions_json_resp,
+                "unified transfers": unified_transfers_json_resp,
+                "card rewards": card_rewards_json_resp,
+                "subscription fees": subscription_data,
+                "brokerage interest income": brokerage_interest_income_json_resp,
+                "boost income": rh_boost_income_json_resp
+            }.items():
+                self.current_run.record_fetch(endpoint, resp["count"], resp["pages"])
+            self.current_run.record_fetch("dividends", len(rh_dividends), 1)
+
+        return {
+            "rh_cash_available_for_withdrawal": rh_cash_available_for_withdrawal,
+            "rhy_accounts_json_resp": rhy_accounts_json_resp,
+            "card_settled_transactions_json_resp": card_settled_transactions_json_resp,
+            "unified_transfers_json_resp": unified_transfers_json_resp,
+            "card_rewards_json_resp": card_rewards_json_resp,
+            "subscription_data": subscription_data,
+            "brokerage_interest_income_json_resp": brokerage_interest_income_json_resp,
+            "rh_dividends": rh_dividends,
+            "rh_boost_income_json_resp": rh_boost_income_json_resp
+        }
 
-        # RH Investment Income & Rewards (RH boost income, as well) 
-        brokerage_interest_income_json_resp = fetch_paginated_robinhood_data("https://api.robinhood.com/accounts/sweeps", "brokerage interest income")
-        rh_dividends = pd.DataFrame(rh.get_dividends())
-        rh_boost_income_json_resp = fetch_paginated_robinhood_data("https://bonfire.robinhood.com/gold/deposit_boost_paid_payouts/", "boost income")
+    def __transform_robinhood_account_data(self, robinhood_data):
 
-        rh.authentication.logout()
+        rhy_accounts_json_resp = robinhood_data["rhy_accounts_json_resp"]
+        card_settled_transactions_json_resp = robinhood_data["card_settled_transactions_json_resp"]
+        unified_transfers_json_resp = robinhood_data["unified_transfers_json_resp"]
+        card_rewards_json_resp = robinhood_data["card_rewards_json_resp"]
+        subscription_data = robinhood_data["subscription_data"]
+        brokerage_interest_income_json_resp = robinhood_data["brokerage_interest_income_json_resp"]
+        rh_dividends = robinhood_data["rh_dividends"]
+        rh_boost_income_json_resp = robinhood_data["rh_boost_income_json_resp"]
 
         # *********************** Transform and normalize the data ***********************
 
@@ -389,9 +1276,8 @@ class PersonalFinanceDataPipeline:
             'Income_Expense_Exclude': False
         })
 
-        # Write interest income and dividends to RH Investment Income & Rewards tab
-        self.wb.sheets["RH Investment Income & Rewards"].range('A1').options(pd.DataFrame, index=False).value = pd.concat([brokerage_interest_income, rh_dividends, card_rewards, rh_boost_income])
-        self.wb.sheets["RH Investment Income & Rewards"].range('A1').current_region.autofit()
+        # Interest income and dividends for the RH Investment Income & Rewards tab
+        rh_income_df = with_cents_amounts(pd.concat([brokerage_interest_income, rh_dividends, card_rewards, rh_boost_income]))
 
         # Transform and normalize the cash card settled transactions data
         card_settled_transactions = pd.json_normalize(card_settled_transactions_json_resp["results"])
@@ -467,14 +1353,40 @@ class PersonalFinanceDataPipeline:
 
         # Combine card transactions and payroll transfers and write to RH Spending Account Txns tab
         rh_spending_df = pd.concat([card_settled_transactions, payroll_transfers, subscription_df])
-        rh_spending_df = rh_spending_df.sort_values(by='Date', ascending=False)
-        self.wb.sheets["RH Spending Account Txns"].range('A1').options(pd.DataFrame, index=False).value = rh_spending_df
-        self.wb.sheets["RH Spending Account Txns"].range('A1').current_region.autofit()
+        rh_spending_df = with_cents_amounts(rh_spending_df.sort_values(by='Date', ascending=False))
 
         # Get the RH Spending Account Txns account available cash balance
         rhy_accounts = pd.json_normalize(rhy_accounts_json_resp["results"])
         spending_account_available_cash = rhy_accounts[rhy_accounts['purpose'] == 'spend'].iloc[0]['cash_available']
 
+        return {
+            "rh_income_df": rh_income_df,
+            "rh_spending_df": rh_spending_df,
+            "rh_cash_available_for_withdrawal": robinhood_data["rh_cash_available_for_withdrawal"],
+            "spending_account_available_cash": spending_account_available_cash
+        }
+
+    def __get_chromedriver_path(self):
+
+        # Read up front (on the thread that owns the workbook) so the scrape itself never touches Excel
+        return self.wb.sheets["Script Control Center & Ref Dta"].range("Chromedriver").value
+
+    def __scrape_firstbank_account_data(self, chromedriver_path):
+
+        # Instantiate the webdriver object (or reuse the warm one). A failed scrape discards the browser, so a retry (or the
+        # daemon's next command) doesn't pick up a half logged in Chrome
+        browser = self.__get_browser(chromedriver_path)
+        try:
+            firstbank_data = self.__scrape_firstbank_pages(browser)
+        except Exception:
+            self.__discard_browser(browser)
+            raise
+        self.__release_browser(browser)
+
+        return firstbank_data
+
+    def __scrape_firstbank_pages(self, browser):
+
         # ***************************************************************************************************************
         #        Data retrieval from FirstBank (account balances and transactions) - Web scraping using Selenium
         # ***************************************************************************************************************
@@ -491,11 +1403,6 @@ class PersonalFinanceDataPipeline:
         accounts.append( '{{accountType={account_name}, selectedNumber=9e720c749c446ee65976669a391134fb}}'.format(account_name = self.account2_name) )
         accounts.append( '{{accountType={account_name}, selectedNumber=8c4a6dff17073338f88e3f5b3ae117a2}}'.format(account_name = self.credit_card_account_name) )
 
-        # Instantiate the webdriver object
-        service = webdriver.chrome.service.Service(self.wb.sheets["Script Control Center & Ref Dta"].range("Chromedriver").value)
-        browser = webdriver.Chrome(service=service)
-        browser.implicitly_wait(30)
-
         # Login to OB (is there a way to use credentials that are saved in the browser???)
         browser.get('https://www.efirstbank.com/')
         browser.find_element(By.ID, 'userId').send_keys(self.firstbank_u)
@@ -556,191 +1463,330 @@ class PersonalFinanceDataPipeline:
                 html_table = html_table[["Date","Account","Amount","Description","Type"]]
                 html_tables.append(html_table)
 
-        # Combine all of the DFs and then export
-        txns_df = pd.concat(html_tables)
-        characters_to_replace = {
-            "$":"",
-            ",":"",
-            "(":"-",
-            ")":""
-        }
-        txns_df["Amount"] = txns_df["Amount"].replace(r'[\$,)]', '', regex=True).replace(r'[(]', '-', regex=True).astype(float) 
-
-        # Log out and close both the browser and db cnxn
+        # Log out (the browser itself is closed or kept warm by the caller)
         time.sleep(2)
         browser.find_element(By.XPATH, "//span[@data-i18n = 'main:Log Out']").click()
-        browser.quit()
+
+        return {
+            "account1_current_balance": account1_current_balance,
+            "account2_current_balance": account2_current_balance,
+            "html_tables": html_tables
+        }
+
+    def __transform_firstbank_transactions(self, firstbank_data):
+
+        # Combine all of the DFs and then export
+        txns_df = pd.concat(firstbank_data["html_tables"])
+        txns_df = with_cents_amounts(txns_df)
 
         # ****************************************************************************************************************
         # Light enrichment of the data but most processing work will be done in the refresh_income_and_expense_data method
         # ****************************************************************************************************************
 
         # Classify transactions as either credit or debit
-        txns_df["Credit_Debit_Ind"] = ""
-        txns_df["Credit_Debit_Ind"] = txns_df["Amount"].apply(assign_credit_debit_ind)
+        txns_df["Credit_Debit_Ind"] = txns_df["Amount Cents"].ge(0).fillna(False).map({True: "Credit", False: "Debit"}) # assign_credit_debit_ind, vectorized
         # Indicate whether the transaction is an income or expense
         txns_df["Income_Expense_Exclude"] = ""
         txns_df["Income_Expense_Exclude"] = txns_df["Description"].apply(self.__assign_exclude_ind)
 
+        return txns_df
+
+    def __write_account_data(self, robinhood_frames, firstbank_data, txns_df):
+
+        # Write interest income and dividends to RH Investment Income & Rewards tab
+        self.wb.sheets["RH Investment Income & Rewards"].range('A1').options(pd.DataFrame, index=False).value = with_dollar_amounts(robinhood_frames["rh_income_df"])
+        self.wb.sheets["RH Investment Income & Rewards"].range('A1').current_region.autofit()
+
+        # Write card transactions and payroll transfers to RH Spending Account Txns tab
+        self.wb.sheets["RH Spending Account Txns"].range('A1').options(pd.DataFrame, index=False).value = with_dollar_amounts(robinhood_frames["rh_spending_df"])
+        self.wb.sheets["RH Spending Account Txns"].range('A1').current_region.autofit()
+
         # ***********************************************************************************************************************
         # Write account balances and FirstBank transactions to Excel
         # ***********************************************************************************************************************
 
         # Write data to Excel
         # -> account balances to the Overview sheet
-        self.wb.sheets["Overview"].range( self.account1_name.replace(" ","_") ).value = float(account1_current_balance.replace("$","").replace(",","").strip())
-        self.wb.sheets["Overview"].range( self.account2_name.replace(" ","_") ).value = float(account2_current_balance.replace("$","").replace(",","").strip())
-        self.wb.sheets["Personal Investment Portfolio"].range( self.account3_name.replace(" ","_") ).value = rh_cash_available_for_withdrawal 
-        self.wb.sheets["Overview"].range(self.account4_name.replace(" ","_")).value = float(spending_account_available_cash)
+        self.wb.sheets["Overview"].range( self.account1_name.replace(" ","_") ).value = cents_to_dollars(parse_currency_to_cents(pd.Series([firstbank_data["account1_current_balance"]]))).iloc[0]
+        self.wb.sheets["Overview"].range( self.account2_name.replace(" ","_") ).value = cents_to_dollars(parse_currency_to_cents(pd.Series([firstbank_data["account2_current_balance"]]))).iloc[0]
+        self.wb.sheets["Personal Investment Portfolio"].range( self.account3_name.replace(" ","_") ).value = robinhood_frames["rh_cash_available_for_withdrawal"]
+        self.wb.sheets["Overview"].range(self.account4_name.replace(" ","_")).value = float(robinhood_frames["spending_account_available_cash"])
         # -> transactions to the All FirstBank Transactions sheet
-        self.wb.sheets["All FirstBank Transactions"].range('A1').options(pd.DataFrame, index = False).value = txns_df
+        self.wb.sheets["All FirstBank Transactions"].range('A1').options(pd.DataFrame, index = False).value = with_dollar_amounts(txns_df)
         self.wb.sheets["All FirstBank Transactions"].range('A1').current_region.autofit()
 
-    def refresh_income_and_expense_data(self): # change this to categories, or... income/expense generator
-
-        # Get FirstBank transactions
-        df = self.wb.sheets["All FirstBank Transactions"].range("A1").current_region.options(pd.DataFrame).value
-        df.reset_index(inplace = True)
-
-        # Get Robinhood transactions and combine all data sets
-        rh_spending_df = self.wb.sheets["RH Spending Account Txns"].range('A1').current_region.options(pd.DataFrame, header=True, index=False).value
-        rh_income_df = self.wb.sheets["RH Investment Income & Rewards"].range('A1').current_region.options(pd.DataFrame, header=True, index=False).value
-        df = pd.concat([df, rh_spending_df, rh_income_df])
-        df.reset_index(inplace = True, drop = True)
-
-        # Filter out all income expense excludes
-        df = df[df["Income_Expense_Exclude"] == False]
-
-        # Classify txns as either income or expense
-        df.loc[(df["Account"] != self.credit_card_account_name) & (df["Credit_Debit_Ind"] == "Credit"), "Income_Expense_Ind"] = "Income"
-        df.loc[(df["Account"] != self.credit_card_account_name) & (df["Credit_Debit_Ind"] == "Debit"), "Income_Expense_Ind"] = "Expense"
-        df.loc[(df["Account"] == self.credit_card_account_name) & (df["Credit_Debit_Ind"] == "Credit"), "Income_Expense_Ind"] = "Expense"
-        df.loc[(df["Account"] == self.credit_card_account_name) & (df["Credit_Debit_Ind"] == "Debit"), "Income_Expense_Ind"] = "Income"
-        df.loc[(df["Account"] == "Robinhood Brokerage") & (df["Credit_Debit_Ind"] == "Credit"), "Income_Expense_Ind"] = "Income"
-        df.loc[(df["Account"] == "Robinhood Cash Card") & (df["Credit_Debit_Ind"] == "Debit"), "Income_Expense_Ind"] = "Expense"
+        self.__record_rows("RH Investment Income & Rewards", len(robinhood_frames["rh_income_df"]))
+        self.__record_rows("RH Spending Account Txns", len(robinhood_frames["rh_spending_df"]))
+        self.__record_rows("All FirstBank Transactions", len(txns_df))
 
-        # Flip the sign on all amounts to be positive (for credit card txns that show negetive amts)
-        # Convert the column to a numeric type and format as Accounting (in Excel), too. - maybe do this later...
-        df["Amount"] = df["Amount"].apply(abs)
+    @recorded_run
+    def refresh_income_and_expense_data(self): # change this to categories, or... income/expense generator
 
-        # drop these cols "Income_Expense_Exclude","Credit_Debit_Ind"
-        df.drop(["Income_Expense_Exclude","Credit_Debit_Ind"], axis=1, inplace=True)
+        with self.__stage("refresh_read"):
+            # Get FirstBank transactions
+            df = self.wb.sheets["All FirstBank Transactions"].range("A1").current_region.options(pd.DataFrame).value
+            df.reset_index(inplace = True)
+
+            # Get Robinhood transactions and combine all data sets
+            rh_spending_df = self.wb.sheets["RH Spending Account Txns"].range('A1').current_region.options(pd.DataFrame, header=True, index=False).value
+            rh_income_df = self.wb.sheets["RH Investment Income & Rewards"].range('A1').current_region.options(pd.DataFrame, header=True, index=False).value
+            df = pd.concat([df, rh_spending_df, rh_income_df])
+            df.reset_index(inplace = True, drop = True)
+            df = with_cents_amounts(df)
+
+        with self.__stage("refresh_classify"):
+            # Filter out all income expense excludes
+            df = df[df["Income_Expense_Exclude"] == False]
+
+            # Classify txns as income or expense, make the amounts positive, clean up descriptions and extract txn dates
+            df = self.__classify_income_expense(df)
+
+        with self.__stage("refresh_categorize"):
+            # Add description category col
+            df["Description_Category"] = ""
+            df["Description_Category"] = df["Description"].apply(self.__categorize_description)
+            self.description_category_cache.save()
+            print(f"Description categories: {self.description_category_cache.hits} cache hits, {self.description_category_cache.misses} rule matches")
+            # Add these description categories manually - an exact join on (date, amount in cents, description), later rows win
+            manual_categories = pd.Series(
+                self.manual_descriptions[3].values,
+                index = pd.MultiIndex.from_arrays([
+                    pd.to_datetime(self.manual_descriptions[0]),
+                    parse_currency_to_cents(self.manual_descriptions[1]),
+                    self.manual_descriptions[2]
+                ])
+            )
+            manual_categories = manual_categories[~manual_categories.index.duplicated(keep = "last")]
+            manual_category = pd.Series(
+                manual_categories.reindex(pd.MultiIndex.from_arrays([df["Date"], df["Amount Cents"], df["Description"]])).values,
+                index = df.index
+            )
+            df["Description_Category"] = manual_category.where(manual_category.notna(), df["Description_Category"])
+
+            # *** Exclude transactions based on txn_excludes table (anti-join on date, amount in cents, description and income/expense) ***
+            txn_exclude_keys = pd.MultiIndex.from_arrays([
+                pd.to_datetime(self.txn_excludes[0]),
+                parse_currency_to_cents(self.txn_excludes[1]),
+                self.txn_excludes[2],
+                self.txn_excludes[3]
+            ])
+            df = df[~pd.MultiIndex.from_arrays([df["Date"], df["Amount Cents"], df["Description"], df["Income or Expense"]]).isin(txn_exclude_keys)]
+
+        with self.__stage("refresh_combine"):
+            # Rename and reorder columns
+            df.rename(columns={
+                "Date": "Post Date",
+                "Description_Category": "Description Category",
+                "Txn Date": "Transaction Date"
+            }, inplace=True)
+        
+            # Convert dates to final format
+            df["Post Date"] = df["Post Date"].dt.strftime('%m/%d/%Y')
+        
+            # Reorder columns
+            df = df[[
+                "Post Date",
+                "Transaction Date",
+                "Account",
+                "Amount Cents",
+                "Description",
+                "Type",
+                "Income or Expense",
+                "Description Category"
+            ]]
+        
+            # **********************************************************************************************************
+            # **********************************************************************************************************
 
-        # Rename the income/expense indicator col
-        df.rename(columns={"Income_Expense_Ind":"Income or Expense"}, inplace=True)
+            # Need to eventually do something more elegant here...
 
-        # Clean up the description col and extract transaction dates
-        df["Description"] = df["Description"].apply(lambda x: remove_visa(x))
-        # Convert Post Date to datetime if it isn't already
-        df["Date"] = pd.to_datetime(df["Date"])
-        # Extract transaction dates and clean descriptions
-        df[["Txn Date", "Description"]] = df.apply(
-            lambda row: extract_and_remove_date(row["Description"], row["Date"]),
-            axis=1, result_type="expand"
-        )
+            # Replace txns for the HOA roof replacement
+            incoming_txn = df[
+                (df["Amount Cents"] == 1681539) & (df["Income or Expense"] == "Income") & (df["Post Date"] == "02/24/2025")
+            ]
+            outgoing_txn = df[
+                (df["Amount Cents"] == 1731639) & (df["Income or Expense"] == "Expense") & (df["Post Date"] == "02/25/2025")
+            ] 
+            df.drop(incoming_txn.index, inplace = True)
+            df.drop(outgoing_txn.index, inplace = True)
+            new_txn = pd.DataFrame([{
+                "Post Date": outgoing_txn["Post Date"].values[0],
+                "Transaction Date": outgoing_txn["Post Date"].values[0],  # Using post date as transaction date since this is a manual entry
+                "Account": outgoing_txn["Account"].values[0],
+                "Amount Cents": 50000,
+                "Description": "Safeco Insurance Deductible - HOA Roof Replacement",
+                "Type": outgoing_txn["Type"].values[0],
+                "Income or Expense": "Expense",
+                "Description Category": ""
+            }])
+
+            # **********************************************************************************************************
+            # **********************************************************************************************************
+
+            # Add upwork income 
+            upwork_income = self.__get_upwork_income()
+            self.__record_rows("Upwork income", len(upwork_income))
+
+            # Combine all data sources (still in cents - the rollup and the search index use cents, only Excel gets dollars)
+            df = pd.concat([df, new_txn, upwork_income])
+            df["Amount Cents"] = df["Amount Cents"].astype("Int64")
+
+            # Convert Post Date back to datetime for proper sorting
+            # Sort by Post Date while it's still in datetime format
+            # Convert back to string format for Excel, handling NaT values
+            df["Post Date"] = pd.to_datetime(df["Post Date"], errors='coerce')
+            df = df.sort_values(by="Post Date", ascending=False)
+            df["Post Date"] = df["Post Date"].dt.strftime('%m/%d/%Y').fillna('')
+            self.__record_rows("transactions", len(df))
+        
+        with self.__stage("write_transactions"):
+            # Update the transactions table in place (a txn is identified by everything but its income/expense and category)
+            transactions_df = with_dollar_amounts(df)
+            transactions_key_cols = ["Post Date", "Transaction Date", "Account", "Amount", "Description", "Type"]
+            if not self.__sync_table(self.wb.sheets["Income and Expense Tracking"], "transactions", transactions_df, transactions_key_cols, sort_col = "Post Date"):
+
+                # Write the df to the Income and Expenses tab and make it a data table
+                self.wb.sheets["Income and Expense Tracking"].tables("transactions").range.clear()
+                self.wb.sheets["Income and Expense Tracking"].range('A1').options(pd.DataFrame, index = False).value = transactions_df
+                self.wb.sheets["Income and Expense Tracking"].tables.add(source = self.wb.sheets["Income and Expense Tracking"].range("A1").current_region, name = "transactions")
+                self.wb.sheets["Income and Expense Tracking"].range('A1').current_region.autofit()
+
+        with self.__stage("monthly_rollup"):
+            # Keep the monthly rollup (what the budgeting views aggregate) up to date alongside the transactions
+            self.__update_monthly_rollup(df)
+
+        with self.__stage("search_index"):
+            # Only descriptions that haven't been seen before get added to the search index
+            index_counts = self.transaction_search.update(df)
+            print(f"Transaction search index: {index_counts['new_descriptions']} new descriptions, {index_counts['rows']} rows")
+
+    def __update_monthly_rollup(self, df):
+
+        txns = pd.DataFrame({
+            "Month": pd.to_datetime(df["Post Date"], format = '%m/%d/%Y', errors = 'coerce').dt.strftime('%Y-%m').fillna(""),
+            "Account": df["Account"].fillna(""),
+            "Description Category": df["Description Category"].fillna(""),
+            "Income or Expense": df["Income or Expense"].fillna(""),
+            "Amount Cents": df["Amount Cents"]
+        })
 
-        # Add description category col
-        df["Description_Category"] = ""
-        df["Description_Category"] = df["Description"].apply(self.__categorize_description)
-        # Add these description categories manually
-        for index, row in self.manual_descriptions.iterrows():
-            if ((df["Date"]==row[0]) & (df["Amount"]==row[1]) & (df["Description"]==row[2])).any():
-                df.loc[ (df["Date"]==row[0]) & (df["Amount"]==row[1]) & (df["Description"]==row[2]), "Description_Category"] = row[3]
+        # Only re-aggregate months that are new or whose transactions changed since the last refresh
+        state_file = os.path.join(PIPELINE_DATA_DIR, "monthly_rollup", self.workbook_key)
+        fingerprints = monthly_fingerprints(txns)
+        previous_fingerprints, rollup = {}, None
+        if os.path.exists(state_file + ".json") and os.path.exists(state_file + ".parquet"):
+            with open(state_file + ".json", "r") as f:
+                previous_fingerprints = json.load(f)
+            rollup = pd.read_parquet(state_file + ".parquet")
+
+        changed_months = {month for month, fingerprint in fingerprints.items() if previous_fingerprints.get(month) != fingerprint}
+        stale_months = changed_months | (set(previous_fingerprints) - set(fingerprints))
+        if rollup is None or stale_months:
+            rollup = pd.concat([
+                rollup[~rollup["Month"].isin(stale_months)] if rollup is not None else None,
+                build_monthly_rollup(txns[txns["Month"].isin(changed_months)])
+            ], ignore_index = True)
+            rollup = rollup.sort_values(ROLLUP_KEY_COLUMNS, ascending = [False, True, True, True]).reset_index(drop = True)
+
+            os.makedirs(os.path.dirname(state_file), exist_ok = True)
+            rollup.to_parquet(state_file + ".parquet", index = False)
+            with open(state_file + ".json", "w") as f:
+                json.dump(fingerprints, f)
+        print(f"Monthly rollup: {len(changed_months)} month(s) re-aggregated, {len(rollup)} rows")
+
+        # Dollars only for Excel, and Month as a real (first of the month) date - Excel would turn "2025-01" text into a
+        # date on write anyway, and then it would never match the key again when the table is synced
+        rollup_df = pd.DataFrame({
+            "Month": pd.to_datetime(rollup["Month"], format = '%Y-%m', errors = 'coerce'),
+            "Account": rollup["Account"],
+            "Description Category": rollup["Description Category"],
+            "Income or Expense": rollup["Income or Expense"],
+            "Total": cents_to_dollars(rollup["Total Cents"]),
+            "Count": rollup["Count"],
+            "Min": cents_to_dollars(rollup["Min Cents"]),
+            "Max": cents_to_dollars(rollup["Max Cents"])
+        })
 
-        # *** Exclude transactions based on txn_excludes table ***
+        # Write it to its own small table (updated in place, so only the changed months' rows are touched)
+        if "Monthly Rollup" not in [sheet.name for sheet in self.wb.sheets]:
+            self.wb.sheets.add("Monthly Rollup", after = self.wb.sheets["Income and Expense Tracking"])
+        rollup_sheet = self.wb.sheets["Monthly Rollup"]
+        if not self.__sync_table(rollup_sheet, "monthly_rollup", rollup_df, ROLLUP_KEY_COLUMNS, sort_col = "Month"):
+            if "monthly_rollup" in [table.name for table in rollup_sheet.tables]:
+                rollup_sheet.tables["monthly_rollup"].delete()
+            rollup_sheet.clear_contents()
+            rollup_sheet.range("A1").options(pd.DataFrame, index = False).value = rollup_df
+            rollup_sheet.tables.add(source = rollup_sheet.range("A1").current_region, name = "monthly_rollup")
+            rollup_sheet.tables["monthly_rollup"].data_body_range.columns[0].number_format = "yyyy-mm"
+            rollup_sheet.range("A1").current_region.autofit()
+        self.__record_rows("monthly_rollup", len(rollup_df))
+
+    def search_transactions(self, query = "", start = None, end = None, min_amount = None, max_amount = None, accounts = None, income_or_expense = None, limit = 500):
+        """
+        Searches the transaction history (as of the last refresh_income_and_expense_data) for descriptions containing every
+        term of the query (case-insensitive, like the Table1 rules), filtered by post date, amount and account.
         
-        for _, exclude_row in self.txn_excludes.iterrows():
-            # Check if matching transactions exist and drop them
-            if ((df["Date"] == exclude_row[0]) & 
-                (df["Amount"] == exclude_row[1]) & 
-                (df["Description"] == exclude_row[2]) & 
-                (df["Income or Expense"] == exclude_row[3])).any():
-                
-                df = df[~((df["Date"] == exclude_row[0]) & 
-                         (df["Amount"] == exclude_row[1]) & 
-                         (df["Description"] == exclude_row[2]) & 
-                         (df["Income or Expense"] == exclude_row[3]))]
+        Returns:
+            pd.DataFrame: Matching transactions, newest first
+        """
+        return self.transaction_search.search(query, start, end, min_amount, max_amount, accounts, income_or_expense, limit)
 
-        # Rename and reorder columns
-        df.rename(columns={
-            "Date": "Post Date",
-            "Description_Category": "Description Category",
-            "Txn Date": "Transaction Date"
-        }, inplace=True)
-        
-        # Convert dates to final format
-        df["Post Date"] = df["Post Date"].dt.strftime('%m/%d/%Y')
-        
-        # Reorder columns
-        df = df[[
-            "Post Date",
-            "Transaction Date",
-            "Account",
-            "Amount",
-            "Description",
-            "Type",
-            "Income or Expense",
-            "Description Category"
-        ]]
+    def explain_description(self, desc):
+        """
+        Shows which Table1 rules (in order - the first one wins) and Table2 excludes match a description, and any Table3
+        manual overrides recorded for it.
         
-        # **********************************************************************************************************
-        # **********************************************************************************************************
-
-        # Need to eventually do something more elegant here...
+        Returns:
+            dict: category, category_rules, excludes and manual_overrides
+        """
+        explanation = self.transaction_search.matching_rules(desc, self.description_category_lookup, self.description_excludes)
+        manual_overrides = self.manual_descriptions[self.manual_descriptions[2].astype(str).str.upper() == str(desc).upper()]
+        explanation["manual_overrides"] = [tuple(override) for override in manual_overrides.itertuples(index = False)]
+        return explanation
 
-        # Replace txns for the HOA roof replacement
-        incoming_txn = df[
-            (df["Amount"] == 16815.39) & (df["Income or Expense"] == "Income") & (df["Post Date"] == "02/24/2025")
-        ]
-        outgoing_txn = df[
-            (df["Amount"] == 17316.39) & (df["Income or Expense"] == "Expense") & (df["Post Date"] == "02/25/2025")
-        ] 
-        df.drop(incoming_txn.index, inplace = True)
-        df.drop(outgoing_txn.index, inplace = True)
-        new_txn = pd.DataFrame([{
-            "Post Date": outgoing_txn["Post Date"].values[0],
-            "Transaction Date": outgoing_txn["Post Date"].values[0],  # Using post date as transaction date since this is a manual entry
-            "Account": outgoing_txn["Account"].values[0],
-            "Amount": 500,
-            "Description": "Safeco Insurance Deductible - HOA Roof Replacement",
-            "Type": outgoing_txn["Type"].values[0],
-            "Income or Expense": "Expense",
-            "Description Category": ""
-        }])
-
-        # **********************************************************************************************************
-        # **********************************************************************************************************
-
-        # Add upwork income 
-        upwork_income = self.__get_upwork_income()
-
-        # Combine all data sources
-        df = pd.concat([df, new_txn, upwork_income])
-
-        # Convert Post Date back to datetime for proper sorting
-        # Sort by Post Date while it's still in datetime format
-        # Convert back to string format for Excel, handling NaT values
-        df["Post Date"] = pd.to_datetime(df["Post Date"], errors='coerce')
-        df = df.sort_values(by="Post Date", ascending=False)
-        df["Post Date"] = df["Post Date"].dt.strftime('%m/%d/%Y').fillna('')
+    def write_description_rule_report(self, min_count = 2, sheet_name = "Description Rule Report"):
+        """
+        Writes the uncategorized descriptions (most frequent first) and the Table1 rule coverage (descriptions and rows each
+        rule matches and actually wins - rules that win nothing are dead or shadowed) to their own sheet.
         
-        # Write the df to the Income and Expenses tab and make it a data table
-        self.wb.sheets["Income and Expense Tracking"].tables("transactions").range.clear()
-        self.wb.sheets["Income and Expense Tracking"].range('A1').options(pd.DataFrame, index = False).value = df
-        self.wb.sheets["Income and Expense Tracking"].tables.add(source = self.wb.sheets["Income and Expense Tracking"].range("A1").current_region, name = "transactions")
-        self.wb.sheets["Income and Expense Tracking"].range('A1').current_region.autofit()
+        Args:
+            min_count (int): Only list uncategorized descriptions seen at least this many times
+            sheet_name (str): Sheet to write to (created if it doesn't exist)
+        """
+        uncategorized = self.transaction_search.uncategorized(min_count)
+        rule_coverage = self.transaction_search.rule_coverage(self.description_category_lookup)
 
-    def get_investments_v1(self): 
+        if sheet_name not in [sheet.name for sheet in self.wb.sheets]:
+            self.wb.sheets.add(sheet_name, after = self.wb.sheets["Script Control Center & Ref Dta"])
+        self.wb.sheets[sheet_name].clear_contents()
+        self.wb.sheets[sheet_name].range("A1").value = "Uncategorized Descriptions"
+        self.wb.sheets[sheet_name].range("A2").options(pd.DataFrame, index = False).value = uncategorized
+        self.wb.sheets[sheet_name].range((1, uncategorized.shape[1] + 2)).value = "Table1 Rule Coverage"
+        self.wb.sheets[sheet_name].range((2, uncategorized.shape[1] + 2)).options(pd.DataFrame, index = False).value = rule_coverage
+        self.wb.sheets[sheet_name].autofit()
+
+    @recorded_run
+    def get_investments_v1(self, write_history_sheet = False): 
 
         # provide option to pull all time investment data from Robinhood and Coinbase (from file...)
 
-        # +++ Robinhood +++
+        # Each step below is also a stage of the run_all orchestrator
+        with self.__stage("robinhood_holdings_fetch"):
+            rh_holdings_df = self.__fetch_robinhood_holdings()
+        with self.__stage("coinbase_holdings_fetch"):
+            coinbase_holdings = self.__fetch_coinbase_holdings()
+        with self.__stage("write_holdings"):
+            self.__write_holdings(rh_holdings_df, coinbase_holdings)
+        if write_history_sheet:
+            self.write_holdings_history()
 
-        # Login
-        rh.authentication.login(self.robinhood_u, self.robinhood_p)
+    def __fetch_robinhood_holdings(self):
+
+        # +++ Robinhood +++
 
         # Get holdings data
-        holdings_data = rh.account.build_holdings()
+        with self.__robinhood_session():
+            holdings_data = rh.account.build_holdings()
         df = pd.DataFrame(holdings_data)
 
         # Parse it out 
@@ -759,14 +1805,14 @@ class PersonalFinanceDataPipeline:
             inplace=True
         )
 
-        # Log out
-        rh.authentication.logout()
+        return df
+
+    def __fetch_coinbase_holdings(self):
 
         # +++ Coinbase +++
 
         # Get all your crypto accounts
-        client0 = Client("0", "0")
-        client = RESTClient(api_key=self.coinbase_key_id, api_secret=self.coinbase_key_secret)
+        client0, client = self.__get_coinbase_clients()
         crypto_accounts = client.get_accounts()["accounts"]
         # Build a list of tuples
         crypto_accounts_with_balances = []
@@ -801,19 +1847,212 @@ class PersonalFinanceDataPipeline:
         usd_amt = df2[(df2["Symbol"]=="USD")].iloc[0]["Quantity"]
         df2.drop(index = df2[(df2["Symbol"]=="USD")].iloc[0].name, inplace = True)
 
-        df = pd.concat([df,df2])
+        return df2, usd_amt
+
+    def __write_holdings(self, rh_holdings_df, coinbase_holdings):
+
+        df2, usd_amt = coinbase_holdings
+        df = pd.concat([rh_holdings_df,df2])
+        self.__record_rows("holdings", len(df))
+
+        # Keep this run's holdings (plus the Coinbase USD cash) in the holdings history
+        self.holdings_snapshot_store.append(pd.concat([
+            df,
+            pd.DataFrame([{"Symbol": "USD", "Name": "Coinbase USD Cash", "Type": "cash", "Quantity": usd_amt, "Current Equity": usd_amt}])
+        ]))
 
         # +++ Write it all to Excel +++
 
-        # Write holdings data to the workbook and make it a table
-        holdings_table_address = self.wb.sheets["Personal Investment Portfolio"].tables["holdings"].range.address
-        self.wb.sheets["Personal Investment Portfolio"].range(re.sub(r'\$(\d+)$', increment, holdings_table_address)).delete(shift='up') 
-        self.wb.sheets["Personal Investment Portfolio"].range("A1").options(index=False).value = df
-        self.wb.sheets["Personal Investment Portfolio"].tables.add(source = self.wb.sheets["Personal Investment Portfolio"].range("A1").current_region, name = "holdings")
-        self.wb.sheets["Personal Investment Portfolio"].range("A1").current_region.autofit()
+        # Update the holdings table in place if possible, otherwise write holdings data to the workbook and make it a table
+        if not self.__sync_table(self.wb.sheets["Personal Investment Portfolio"], "holdings", df, ["Symbol", "Type"]):
+            holdings_table_address = self.wb.sheets["Personal Investment Portfolio"].tables["holdings"].range.address
+            self.wb.sheets["Personal Investment Portfolio"].range(re.sub(r'\$(\d+)$', increment, holdings_table_address)).delete(shift='up') 
+            self.wb.sheets["Personal Investment Portfolio"].range("A1").options(index=False).value = df
+            self.wb.sheets["Personal Investment Portfolio"].tables.add(source = self.wb.sheets["Personal Investment Portfolio"].range("A1").current_region, name = "holdings")
+            self.wb.sheets["Personal Investment Portfolio"].range("A1").current_region.autofit()
         self.wb.sheets["Personal Investment Portfolio"].range("coinbase_usd_cash_bal").value = usd_amt
 
+    def write_holdings_history(self, by = "Type", start = None, end = None, sheet_name = "Holdings History"):
+        """
+        Writes daily equity (last snapshot of each day) per type or symbol from the holdings history to its own sheet.
+        
+        Args:
+            by (str): "Type" or "Symbol"
+            start, end: Optional date range
+            sheet_name (str): Sheet to write to (created if it doesn't exist)
+        """
+        daily_equity = self.holdings_snapshot_store.daily_equity(start, end, by = by)
+        daily_equity.index.name = "Date"
+
+        if sheet_name not in [sheet.name for sheet in self.wb.sheets]:
+            self.wb.sheets.add(sheet_name, after = self.wb.sheets["Personal Investment Portfolio"])
+        self.wb.sheets[sheet_name].clear_contents()
+        self.wb.sheets[sheet_name].range("A1").options(pd.DataFrame, index = True).value = daily_equity
+        self.wb.sheets[sheet_name].range("A1").current_region.autofit()
+
+    @recorded_run
+    def run_all(self, max_workers = 4, retries = 2):
+        """
+        Runs a full refresh - what the retrieve_account_data_and_transactions, refresh_income_and_expense_data and
+        get_investments_v1 macros do one after the other - as a graph of stages. The Robinhood fetch, the FirstBank scrape and
+        the holdings fetches run concurrently, transforms start as soon as their inputs are in, and the Excel writes run one at
+        a time on this thread. A timing report with the critical path is printed at the end.
+        
+        Args:
+            max_workers (int): Number of stages that can run at the same time
+            retries (int): Number of retries for each retrieval stage
+        
+        Returns:
+            dict: The stage graph report (see run_stage_graph)
+        """
+        # Excel is only ever touched from this thread, so read the chromedriver path up front
+        chromedriver_path = self.__get_chromedriver_path()
+
+        stages = [
+            # Retrieval (concurrent)
+            {"name": "robinhood_fetch", "func": lambda inputs: self.__fetch_robinhood_account_data(), "retries": retries},
+            {"name": "firstbank_scrape", "func": lambda inputs: self.__scrape_firstbank_account_data(chromedriver_path), "retries": retries},
+            {"name": "robinhood_holdings_fetch", "func": lambda inputs: self.__fetch_robinhood_holdings(), "retries": retries},
+            {"name": "coinbase_holdings_fetch", "func": lambda inputs: self.__fetch_coinbase_holdings(), "retries": retries},
+            # Transforms
+            {"name": "robinhood_transform", "deps": ["robinhood_fetch"],
+             "func": lambda inputs: self.__transform_robinhood_account_data(inputs["robinhood_fetch"])},
+            {"name": "firstbank_transform", "deps": ["firstbank_scrape"],
+             "func": lambda inputs: self.__transform_firstbank_transactions(inputs["firstbank_scrape"])},
+            # Excel writes (serialized on this thread)
+            {"name": "write_account_data", "deps": ["robinhood_transform", "firstbank_scrape", "firstbank_transform"], "main_thread": True,
+             "func": lambda inputs: self.__write_account_data(inputs["robinhood_transform"], inputs["firstbank_scrape"], inputs["firstbank_transform"])},
+            {"name": "refresh_income_and_expense_data", "deps": ["write_account_data"], "main_thread": True,
+             "func": lambda inputs: self.refresh_income_and_expense_data()},
+            {"name": "write_holdings", "deps": ["robinhood_holdings_fetch", "coinbase_holdings_fetch"], "main_thread": True,
+             "func": lambda inputs: self.__write_holdings(inputs["robinhood_holdings_fetch"], inputs["coinbase_holdings_fetch"])}
+        ]
+
+        # Share one Robinhood login between the concurrent fetches (and don't log out from under one of them)
+        keep_sessions_warm = self.keep_sessions_warm
+        self.keep_sessions_warm = True
+        try:
+            report = run_stage_graph(stages, max_workers)
+        finally:
+            self.keep_sessions_warm = keep_sessions_warm
+            if not keep_sessions_warm:
+                self.close_sessions()
+
+        print(format_stage_report(report))
+        if self.current_run:
+            for name, timing in report["timings"].items():
+                self.current_run.record_stage(name, timing["end"] - timing["start"], timing["status"])
+
+        if report["failed"]:
+            for name, error in report["failed"].items():
+                print(f"Stage {name} failed:\n{error}")
+            raise RuntimeError(f"run_all failed in stage(s): {', '.join(report['failed'])}")
+
+        return report
+
+    def __get_estatement_folders(self):
+
+        # Account name -> its "Current Statements in OB" folder
+        assets_and_liabilities = self.wb.sheets["Script Control Center & Ref Dta"].range("Assets_and_Liabilities_Path").value
+        firstbank_asset_accounts = os.path.join(assets_and_liabilities, "Assets", "Bank Accounts", "FirstBank")
+        firstbank_liability_account = os.path.join(assets_and_liabilities, "Liabilities", "FirstBank {account_name}".format(account_name = self.credit_card_account_name))
+        return {
+            self.account1_name: os.path.join(firstbank_asset_accounts, self.account1_name, "Current Statements in OB"),
+            self.account2_name: os.path.join(firstbank_asset_accounts, self.account2_name, "Current Statements in OB"),
+            self.account3_name: os.path.join(firstbank_asset_accounts, self.account3_name, "Current Statements in OB"),
+            self.credit_card_account_name: os.path.join(firstbank_liability_account, "Current Statements in OB")
+        }
+
+    @recorded_run
+    def retrieve_estatements_parallel(self, max_workers = 4, account_groups = None, base_url = ESTATEMENTS_BASE_URL, retries = 1, resume = True):
+        """
+        Parallel, resumable version of retrieve_estatements. The accounts are split into groups, and each group is handled
+        by its own isolated browser worker (own Chrome, own login, own download folder). Statements that are already in
+        the account's "Current Statements in OB" folder are skipped, progress is checkpointed after every statement so an
+        interrupted run picks up where it stopped, and one failing statement doesn't stop the others. Each account's
+        statements are merged once all of them are in.
+        
+        Args:
+            max_workers (int): Number of browser workers running at once
+            account_groups (list): Lists of account names, one per worker (defaults to one worker per account)
+            base_url (str): Online banking start page (point it at locally served fixtures for testing)
+            retries (int): Retries per statement
+            resume (bool): Resume from the checkpoint of an interrupted run (False starts over)
+        
+        Returns:
+            dict: Account name -> {"downloaded", "skipped", "failed"}
+        """
+        # Everything that comes from the workbook is read here, on the thread that owns it
+        export_folders = self.__get_estatement_folders()
+        chromedriver_path = self.__get_chromedriver_path()
+        downloaded_estatement_folder = self.wb.sheets["Script Control Center & Ref Dta"].range("Downloaded_eStatement_folder").value
+        log_file = self.wb.sheets["Script Control Center & Ref Dta"].range("Log_File").value
+
+        checkpoint = EStatementCheckpoint(os.path.join(
+            PIPELINE_DATA_DIR, "estatement_checkpoints", self.workbook_key + ".json"
+        ))
+        if not resume:
+            checkpoint.clear()
+
+        account_groups = account_groups or [[account_name] for account_name in export_folders]
+        summary = {}
+        with ThreadPoolExecutor(max_workers = max_workers) as executor:
+            futures = {
+                executor.submit(
+                    download_estatements_for_accounts,
+                    accounts,
+                    export_folders,
+                    (self.firstbank_u, self.firstbank_p),
+                    chromedriver_path,
+                    os.path.join(downloaded_estatement_folder, f"worker_{worker_id}"),
+                    checkpoint,
+                    base_url,
+                    retries
+                ): accounts
+                for worker_id, accounts in enumerate(account_groups)
+            }
+            for future in futures:
+                try:
+                    summary.update(future.result())
+                except Exception as e:
+                    # e.g. the worker couldn't log in - its accounts are retried on the next (resumed) run
+                    error = f"{e}\n{traceback.format_exc()}"
+                    summary.update({account_name: {"downloaded": 0, "skipped": 0, "failed": [("worker", error)]} for account_name in futures[future]})
+
+        # Merge the statements of every account that's complete
+        for account_name, export_folder in export_folders.items():
+            if account_name in summary and not summary[account_name]["failed"]:
+                pdf_list = sorted(os.path.join(export_folder, f) for f in os.listdir(export_folder) if f.lower().endswith(".pdf"))
+                if pdf_list:
+                    eStatement_account = os.path.basename(os.path.split(export_folder)[0])
+                    PDFmerge(
+                        pdf_list,
+                        os.path.join(
+                            os.path.abspath(os.path.join(export_folder, os.pardir)),
+                            'Merged {eStatement_account} eStatements.pdf'.format(eStatement_account = eStatement_account)
+                        )
+                    )
+
+        failures = [(account_name, statement_date, error) for account_name, counts in summary.items() for statement_date, error in counts["failed"]]
+        self.__record_rows("estatements", sum(counts["downloaded"] for counts in summary.values()))
+
+        # write to log file
+        with open(log_file, 'w') as f:
+            if failures:
+                for account_name, statement_date, error in failures:
+                    f.write(f"{account_name} {statement_date}: {error}\n")
+            else:
+                f.write("eStatements Retrieved Successfully")
+
+        if failures:
+            raise RuntimeError(f"{len(failures)} eStatement(s) failed, re-run to resume: " + ", ".join(f"{a} {d}" for a, d, _ in failures))
+
+        # Nothing left to resume
+        checkpoint.clear()
+        return summary
+
     # THIS FUNCTION IS DEPRECATED - No longer needed for eStatement retrieval
+    @recorded_run
     def retrieve_estatements(self):
 
         try:
@@ -961,3 +2200,7 @@ class PersonalFinanceDataPipeline:
             with open(self.wb.sheets["Script Control Center & Ref Dta"].range("Log_File").value, 'w') as f:
                 f.write(str(e))
                 f.write(traceback.format_exc())
+
+            # Errors are handled here (and not raised), so hand them to the run ledger explicitly
+            if self.current_run:
+                self.current_run.record_error(f"{e}\n{traceback.format_exc()}")
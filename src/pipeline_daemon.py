@@ -0,0 +1,220 @@
+
+# Personal Finance Data Pipeline - Resident Daemon
+# Keeps the pipeline imported, the workbook attached and the API/browser sessions warm between VBA button clicks
+
+from multiprocessing.connection import Listener, Client
+from multiprocessing import AuthenticationError
+import traceback
+import argparse
+import secrets
+import time
+import sys
+import os
+
+"""
+Pipeline Daemon
+Every VBA macro normally starts a fresh interpreter through RunPython, which re-imports pandas/selenium/robin_stocks and
+logs in (and out) of Robinhood, Chrome and Coinbase on every click. This module provides an optional long-running local
+daemon that does all of that once and then serves commands over a local socket, so a repeated refresh only costs the work
+itself. The reference data (Table1/2/3, txn_excludes, etc.) is still re-read on every run - those are cheap reads - so
+edits to it always take effect, and a workbook that has been closed is re-attached on its next command.
+
+The daemon only listens on 127.0.0.1 and requires an auth key that is generated on first use and stored in the
+pipeline's data folder, so only the current user can send it commands.
+
+Usage:
+    python pipeline_daemon.py serve --creds-provider retrieve_creds:retrieve_creds_for_money_manager
+    python pipeline_daemon.py run --workbook "C:/.../Money Management.xlsm" --method refresh_income_and_expense_data
+    python pipeline_daemon.py reload --workbook "C:/.../Money Management.xlsm"
+    python pipeline_daemon.py status
+    python pipeline_daemon.py shutdown
+
+The client commands exit with code 2 if the daemon can't be reached (not running, wrong auth key, dropped connection) and
+1 if the command failed, so the VBA macros can fall back to RunPython.
+
+Functions:
+-----------
+get_authkey()
+    Returns the daemon's auth key, generating and storing it on first use.
+serve(port, creds_provider)
+    Runs the daemon until it receives a shutdown command.
+send_command(command, port, timeout)
+    Sends a single command to the daemon and returns its response.
+"""
+
+DEFAULT_PORT = 47617
+
+# Same folder the pipeline module persists its caches to (kept in sync by hand so the client doesn't need the heavy imports)
+PIPELINE_DATA_DIR = os.path.join(os.path.expanduser("~"), ".personal_finance_data_pipeline")
+
+def get_authkey():
+
+    authkey_file = os.path.join(PIPELINE_DATA_DIR, "daemon_authkey")
+    if not os.path.exists(authkey_file):
+        os.makedirs(PIPELINE_DATA_DIR, exist_ok=True)
+        with open(authkey_file, "w") as f:
+            f.write(secrets.token_hex(32))
+    with open(authkey_file, "r") as f:
+        return f.read().strip().encode("utf-8")
+
+class PipelineDaemon:
+    """
+    Holds one warm PersonalFinanceDataPipeline per workbook and runs commands against them one at a time.
+
+    Args:
+        creds_provider (str): "module:function" that returns the creds dict (optional if only non-API methods are used)
+    """
+
+    def __init__(self, creds_provider=None):
+
+        # Heavy imports only happen in the daemon process, never in the client
+        try:
+            from .personal_finance_data_pipeline import PersonalFinanceDataPipeline
+            from .batch_runner import load_creds
+        except ImportError:
+            from personal_finance_data_pipeline import PersonalFinanceDataPipeline
+            from batch_runner import load_creds
+        import xlwings as xw
+
+        self.pipeline_class = PersonalFinanceDataPipeline
+        self.xw = xw
+        self.creds = load_creds(creds_provider)
+        self.pipelines = {}
+        self.started_at = time.time()
+        self.commands_served = 0
+
+    def get_pipeline(self, workbook_path):
+
+        workbook_key = os.path.normcase(os.path.abspath(workbook_path))
+        pipeline = self.pipelines.get(workbook_key)
+
+        if pipeline is not None:
+            try:
+                # Fails if the workbook was closed or Excel restarted since the last command
+                pipeline.wb.fullname
+            except Exception:
+                print(f"Workbook {workbook_path} no longer responds, re-attaching it")
+                self.drop_pipeline(workbook_key)
+            else:
+                # Re-read the reference data so edits made since the last command take effect
+                pipeline.load_reference_data()
+                return pipeline
+
+        # Attach to the workbook the user already has open rather than opening a second copy (this reads the reference data)
+        pipeline = self.pipeline_class(self.creds, wb=self.xw.Book(workbook_path))
+        pipeline.keep_sessions_warm = True
+        self.pipelines[workbook_key] = pipeline
+
+        return pipeline
+
+    def drop_pipeline(self, workbook_key):
+
+        pipeline = self.pipelines.pop(workbook_key)
+        try:
+            pipeline.close_sessions()
+        except Exception:
+            traceback.print_exc()
+
+    def handle(self, command):
+
+        action = command.get("action")
+
+        if action == "run":
+            pipeline = self.get_pipeline(command["workbook"])
+            method = getattr(pipeline, command["method"])
+            method_start = time.perf_counter()
+            method()
+            return {"status": "ok", "duration": round(time.perf_counter() - method_start, 2)}
+
+        if action == "reload":
+            self.get_pipeline(command["workbook"])
+            return {"status": "ok"}
+
+        if action == "status":
+            return {
+                "status": "ok",
+                "uptime": round(time.time() - self.started_at, 1),
+                "commands_served": self.commands_served,
+                "workbooks": list(self.pipelines)
+            }
+
+        if action == "shutdown":
+            return {"status": "ok"}
+
+        return {"status": "error", "error": f"Unknown action: {action}"}
+
+    def close(self):
+
+        for workbook_key in list(self.pipelines):
+            self.drop_pipeline(workbook_key)
+
+def serve(port=DEFAULT_PORT, creds_provider=None):
+
+    daemon = PipelineDaemon(creds_provider)
+    print(f"Pipeline daemon listening on 127.0.0.1:{port}")
+
+    with Listener(("127.0.0.1", port), authkey=get_authkey()) as listener:
+
+        running = True
+        while running:
+
+            try:
+                conn = listener.accept()
+            except Exception:
+                # Bad auth key, dropped connection, etc. - ignore and keep serving
+                traceback.print_exc()
+                continue
+
+            with conn:
+                try:
+                    command = conn.recv()
+                    print(f"Received command: {command}")
+                    try:
+                        response = daemon.handle(command)
+                    except Exception as e:
+                        response = {"status": "error", "error": f"{e}\n{traceback.format_exc()}"}
+                    daemon.commands_served += 1
+                    conn.send(response)
+                    running = command.get("action") != "shutdown"
+                except (EOFError, OSError):
+                    traceback.print_exc()
+
+    daemon.close()
+    print("Pipeline daemon stopped")
+
+def send_command(command, port=DEFAULT_PORT, timeout=None):
+
+    with Client(("127.0.0.1", port), authkey=get_authkey()) as conn:
+        conn.send(command)
+        if timeout is not None and not conn.poll(timeout):
+            raise TimeoutError(f"No response from the pipeline daemon after {timeout} seconds")
+        return conn.recv()
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Resident daemon for the personal finance data pipeline.")
+    parser.add_argument("action", choices=["serve", "run", "reload", "status", "shutdown"])
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--creds-provider", default=None, help='"module:function" returning the creds dict (serve only)')
+    parser.add_argument("--workbook", default=None, help="Full path of the workbook to run against")
+    parser.add_argument("--method", default=None, help="Pipeline method to run")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds to wait for a response")
+    args = parser.parse_args()
+
+    if args.action == "serve":
+        serve(args.port, args.creds_provider)
+        sys.exit(0)
+
+    try:
+        response = send_command(
+            {"action": args.action, "workbook": args.workbook, "method": args.method},
+            port=args.port,
+            timeout=args.timeout
+        )
+    except (OSError, EOFError, AuthenticationError) as e:
+        # Not running, wrong auth key, dropped connection or no response (ConnectionError and TimeoutError are OSErrors)
+        print(f"Pipeline daemon unavailable: {e}")
+        sys.exit(2)
+
+    print(response)
+    sys.exit(0 if response.get("status") == "ok" else 1)
@@ -0,0 +1,289 @@
+
+# Personal Finance Data Pipeline - Run Ledger
+# Local SQLite history of every pipeline run, with a CLI that flags slowdowns and partial fetches
+
+from contextlib import contextmanager
+from statistics import median
+from datetime import datetime
+import threading
+import argparse
+import sqlite3
+import time
+import sys
+import os
+
+"""
+Run Ledger
+Every run of a pipeline method is recorded in a local SQLite database: start and end times, status and error, per-stage
+durations, records and pages fetched per endpoint, and output row counts. The CLI compares the most recent runs against a
+rolling baseline (the median of the preceding successful runs of the same method on the same workbook) and flags slowdowns and sudden drops in counts - e.g. an
+endpoint silently returning fewer pages - before a partial fetch makes it into the workbook.
+
+Usage:
+    python run_ledger.py report                       # check the latest run of every method
+    python run_ledger.py report --method run_all --recent 3 --baseline 20
+    python run_ledger.py report --workbook Money_Management_3f9c2a1b   # workbook key, as listed by history
+    python run_ledger.py history --method refresh_income_and_expense_data
+
+Classes:
+--------
+RunLedger
+    start_run(method, workbook)     Starts recording a run and returns its RunRecorder.
+    runs(method, workbook, limit)   Recent runs (newest first) with their stages, fetches and row counts.
+    run_keys()                      Every (method, workbook) pair in the ledger.
+RunRecorder
+    stage(name)                     Context manager timing a stage.
+    record_stage(name, duration, status), record_fetch(endpoint, records, pages), record_rows(output, row_count), record_error(error)
+    finish(status, error)           Writes the whole run to the ledger in one transaction.
+
+Functions:
+-----------
+find_regressions(ledger, method, workbook, recent, baseline, slowdown, drop)
+    Returns a list of human readable findings for the most recent runs of a method on a workbook.
+"""
+
+# Same folder the pipeline module persists its caches to
+PIPELINE_DATA_DIR = os.path.join(os.path.expanduser("~"), ".personal_finance_data_pipeline")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    method TEXT NOT NULL,
+    workbook TEXT,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    duration REAL,
+    status TEXT,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS stages (run_id INTEGER, stage TEXT, duration REAL, status TEXT);
+CREATE TABLE IF NOT EXISTS fetches (run_id INTEGER, endpoint TEXT, records INTEGER, pages INTEGER);
+CREATE TABLE IF NOT EXISTS row_counts (run_id INTEGER, output TEXT, row_count INTEGER);
+CREATE INDEX IF NOT EXISTS runs_method_started ON runs (method, started_at);
+"""
+
+class RunRecorder:
+    """
+    Collects everything about one run in memory (safe to use from the run_all worker threads) and writes it to the
+    ledger in a single transaction when the run finishes.
+    """
+
+    def __init__(self, ledger, method, workbook):
+
+        self.ledger = ledger
+        self.method = method
+        self.workbook = workbook
+        self.started_at = time.time()
+        self.stages = []
+        self.fetches = []
+        self.row_counts = []
+        self.errors = []
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+
+        stage_start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record_stage(name, time.perf_counter() - stage_start, "Failed")
+            raise
+        self.record_stage(name, time.perf_counter() - stage_start, "Succeeded")
+
+    def record_stage(self, name, duration, status="Succeeded"):
+
+        with self.lock:
+            self.stages.append((name, duration, status))
+
+    def record_fetch(self, endpoint, records, pages):
+
+        with self.lock:
+            self.fetches.append((endpoint, records, pages))
+
+    def record_rows(self, output, row_count):
+
+        with self.lock:
+            self.row_counts.append((output, row_count))
+
+    def record_error(self, error):
+
+        with self.lock:
+            self.errors.append(error)
+
+    def finish(self, status="Succeeded", error=None):
+
+        if error:
+            self.errors.append(error)
+        if self.errors:
+            status = "Failed"
+        finished_at = time.time()
+
+        with self.ledger.connect() as conn:
+            run_id = conn.execute(
+                "INSERT INTO runs (method, workbook, started_at, finished_at, duration, status, error) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.method, self.workbook, self.started_at, finished_at, finished_at - self.started_at, status,
+                 "\n\n".join(self.errors) or None)
+            ).lastrowid
+            conn.executemany("INSERT INTO stages VALUES (?, ?, ?, ?)", [(run_id,) + stage for stage in self.stages])
+            conn.executemany("INSERT INTO fetches VALUES (?, ?, ?, ?)", [(run_id,) + fetch for fetch in self.fetches])
+            conn.executemany("INSERT INTO row_counts VALUES (?, ?, ?)", [(run_id,) + row_count for row_count in self.row_counts])
+
+        return run_id
+
+class RunLedger:
+
+    def __init__(self, db_file=None):
+
+        self.db_file = db_file or os.path.join(PIPELINE_DATA_DIR, "run_ledger.sqlite")
+        os.makedirs(os.path.dirname(self.db_file), exist_ok=True)
+        with self.connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def connect(self):
+
+        conn = sqlite3.connect(self.db_file)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def start_run(self, method, workbook=None):
+
+        return RunRecorder(self, method, workbook)
+
+    def runs(self, method=None, workbook=None, limit=50):
+        """
+        Returns the most recent runs (newest first) as dicts, each with its stage durations, fetch counts and row counts.
+        Optionally only the runs of one method and/or one workbook.
+        """
+        with self.connect() as conn:
+
+            conn.row_factory = sqlite3.Row
+            conditions, params = [], []
+            if method:
+                conditions.append("method = ?")
+                params.append(method)
+            if workbook:
+                conditions.append("workbook = ?")
+                params.append(workbook)
+            query = "SELECT * FROM runs" + (" WHERE " + " AND ".join(conditions) if conditions else "") + " ORDER BY started_at DESC LIMIT ?"
+            runs = [dict(row) for row in conn.execute(query, params + [limit])]
+
+            for run in runs:
+                run["stages"] = {row["stage"]: row["duration"] for row in conn.execute(
+                    "SELECT stage, duration FROM stages WHERE run_id = ?", (run["run_id"],))}
+                run["fetches"] = {row["endpoint"]: (row["records"], row["pages"]) for row in conn.execute(
+                    "SELECT endpoint, records, pages FROM fetches WHERE run_id = ?", (run["run_id"],))}
+                run["row_counts"] = {row["output"]: row["row_count"] for row in conn.execute(
+                    "SELECT output, row_count FROM row_counts WHERE run_id = ?", (run["run_id"],))}
+
+        return runs
+
+    def run_keys(self):
+
+        with self.connect() as conn:
+            return [tuple(row) for row in conn.execute("SELECT DISTINCT method, workbook FROM runs ORDER BY method, workbook")]
+
+def find_regressions(ledger, method, workbook=None, recent=1, baseline=10, slowdown=1.5, drop=0.5):
+    """
+    Compares each of the `recent` newest runs of a method on a workbook against the median of the `baseline` successful
+    runs before it (on the same workbook, since every household member's workbook has its own typical counts).
+
+    Args:
+        ledger (RunLedger): The ledger to read
+        method (str): Pipeline method name
+        workbook (str): Workbook name (None compares across all workbooks)
+        recent (int): How many of the newest runs to check
+        baseline (int): How many earlier successful runs make up the rolling baseline
+        slowdown (float): Flag durations above this multiple of the baseline
+        drop (float): Flag records/pages/row counts below this fraction of the baseline
+
+    Returns:
+        list: Findings (strings); empty if nothing looks off
+    """
+    runs = ledger.runs(method, workbook, limit=recent + baseline * 2)
+    findings = []
+
+    for i, run in enumerate(runs[:recent]):
+
+        label = f"{method} run {run['run_id']}" + (f" on {workbook}" if workbook else "") + f" ({datetime.fromtimestamp(run['started_at']):%Y-%m-%d %H:%M})"
+        if run["status"] != "Succeeded":
+            first_error_line = (run["error"] or "").strip().splitlines()[:1]
+            findings.append(f"{label}: {run['status']}" + (f" - {first_error_line[0]}" if first_error_line else ""))
+
+        history = [earlier for earlier in runs[i + 1:] if earlier["status"] == "Succeeded"][:baseline]
+        if not history:
+            continue
+
+        def check_slowdown(name, value, baseline_values):
+            if value is not None and baseline_values:
+                typical = median(baseline_values)
+                if typical > 0 and value > slowdown * typical:
+                    findings.append(f"{label}: {name} took {value:.1f}s vs a typical {typical:.1f}s")
+
+        def check_drop(name, value, baseline_values):
+            if value is not None and baseline_values:
+                typical = median(baseline_values)
+                if typical > 0 and value < drop * typical:
+                    findings.append(f"{label}: {name} was {value} vs a typical {typical:g}")
+
+        check_slowdown("the run", run["duration"], [earlier["duration"] for earlier in history])
+        for stage, duration in run["stages"].items():
+            check_slowdown(f"stage {stage}", duration, [earlier["stages"][stage] for earlier in history if stage in earlier["stages"]])
+        for endpoint, (records, pages) in run["fetches"].items():
+            earlier_fetches = [earlier["fetches"][endpoint] for earlier in history if endpoint in earlier["fetches"]]
+            check_drop(f"{endpoint} records", records, [fetch[0] for fetch in earlier_fetches])
+            check_drop(f"{endpoint} pages", pages, [fetch[1] for fetch in earlier_fetches])
+        for output, row_count in run["row_counts"].items():
+            check_drop(f"{output} rows", row_count, [earlier["row_counts"][output] for earlier in history if output in earlier["row_counts"]])
+
+        # An endpoint or output that the baseline always had but this run didn't record at all
+        if run["status"] == "Succeeded":
+            for endpoint in set.intersection(*[set(earlier["fetches"]) for earlier in history]) - set(run["fetches"]):
+                findings.append(f"{label}: no fetch recorded for {endpoint}")
+            for output in set.intersection(*[set(earlier["row_counts"]) for earlier in history]) - set(run["row_counts"]):
+                findings.append(f"{label}: no rows recorded for {output}")
+
+    return findings
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Pipeline run history and regression checks.")
+    parser.add_argument("action", choices=["report", "history"])
+    parser.add_argument("--db", default=None, help="Ledger database (defaults to the pipeline's data folder)")
+    parser.add_argument("--method", default=None, help="Only this pipeline method")
+    parser.add_argument("--workbook", default=None, help="Only this workbook (its key, as recorded)")
+    parser.add_argument("--recent", type=int, default=1, help="Number of newest runs to check")
+    parser.add_argument("--baseline", type=int, default=10, help="Number of earlier successful runs in the rolling baseline")
+    parser.add_argument("--slowdown", type=float, default=1.5, help="Flag durations above this multiple of the baseline")
+    parser.add_argument("--drop", type=float, default=0.5, help="Flag counts below this fraction of the baseline")
+    parser.add_argument("--limit", type=int, default=20, help="Number of runs to list (history)")
+    args = parser.parse_args()
+
+    ledger = RunLedger(args.db)
+    run_keys = [
+        (method, workbook) for method, workbook in ledger.run_keys()
+        if (args.method is None or method == args.method) and (args.workbook is None or workbook == args.workbook)
+    ]
+
+    if args.action == "history":
+        for method, workbook in run_keys:
+            for run in ledger.runs(method, workbook, limit=args.limit):
+                print(
+                    f"{run['run_id']:>5}  {datetime.fromtimestamp(run['started_at']):%Y-%m-%d %H:%M}  {method:<40} {workbook or '':<40} "
+                    f"{run['status']:<10} {run['duration'] or 0:>7.1f}s  rows: {run['row_counts']}"
+                )
+        sys.exit(0)
+
+    # Each method is compared per workbook, so one household member's smaller workbook never skews another's baseline
+    all_findings = []
+    for method, workbook in run_keys:
+        all_findings += find_regressions(ledger, method, workbook, args.recent, args.baseline, args.slowdown, args.drop)
+
+    if all_findings:
+        print("\n".join(all_findings))
+        sys.exit(1)
+    print("No regressions found")
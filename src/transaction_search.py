@@ -0,0 +1,385 @@
+
+# Personal Finance Data Pipeline - Transaction Search
+# Trigram index over the transaction descriptions for fast substring search, rule checks and uncategorized reports
+
+from datetime import datetime
+import pandas as pd
+import numpy as np
+import argparse
+import json
+import sys
+import os
+
+"""
+Transaction Search
+Tuning the Table1 categories, Table2 excludes and Table3 manual overrides means repeatedly searching the transaction
+history for descriptions. This module keeps a search index next to the combined output of refresh_income_and_expense_data:
+
+- every distinct (upper-cased) description gets an id, and a trigram inverted index (trigram -> description ids) is kept
+  as a sorted array, so a substring query only verifies the few descriptions that contain all of its trigrams
+- the transactions are stored sorted by description id, so the rows of the matching descriptions are contiguous slices
+  that are then filtered by date range, amount and account
+
+Matching is a case-insensitive substring match, the same as the Table1 rules. After each refresh, update() only tokenizes
+descriptions that have never been seen before; the rows are replaced (and only rewritten when they changed), and handing
+over the same transactions as the last update is detected up front from a hash of the incoming frame.
+
+Layout:
+    <root>/manifest.json
+    <root>/descriptions.parquet     (description id -> upper-cased description)
+    <root>/trigrams.parquet         (trigram, description id) sorted by trigram
+    <root>/rows.parquet             (the transactions, sorted by description id)
+
+Usage:
+    python transaction_search.py search "AMAZON" --index <root> --start 2025-01-01 --account "Visa" --min-amount 20
+    python transaction_search.py uncategorized --index <root> --limit 50
+
+Classes:
+--------
+TransactionSearchIndex
+    update(txns_df)                                     Brings the index up to date with the latest transactions.
+    search(query, start, end, min_amount, max_amount, accounts, income_or_expense, limit)
+                                                        Transactions whose description contains every term of the query.
+    uncategorized(min_count, limit)                     Uncategorized descriptions by frequency.
+    matching_rules(description, category_rules, exclude_rules)
+                                                        Which Table1 / Table2 rules match a description, and which one wins.
+    rule_coverage(category_rules)                       Descriptions and rows each Table1 rule matches and wins.
+"""
+
+ROW_COLUMNS = ["Post Date", "Transaction Date", "Account", "Amount Cents", "Description", "Type", "Income or Expense", "Description Category"]
+
+def normalize_description(desc):
+
+    # Same normalization the category rules are matched with (case-insensitive substring)
+    return str(desc).upper()
+
+def encode_trigrams(text):
+
+    # Each trigram is packed into one int64 (3 x 21 bits covers every unicode code point), so there are no collisions
+    return {(ord(text[i]) << 42) | (ord(text[i + 1]) << 21) | ord(text[i + 2]) for i in range(len(text) - 2)}
+
+class TransactionSearchIndex:
+
+    def __init__(self, root_dir):
+
+        self.root_dir = root_dir
+        self.manifest_file = os.path.join(root_dir, "manifest.json")
+        self.loaded = False
+
+    def __load(self):
+
+        if self.loaded:
+            return
+
+        self.manifest = {}
+        self.descriptions = np.array([], dtype=object)
+        self.trigrams = np.array([], dtype=np.int64)
+        self.trigram_desc_ids = np.array([], dtype=np.int64)
+        self.rows = pd.DataFrame(columns=ROW_COLUMNS + ["desc_id"])
+
+        if os.path.exists(self.manifest_file):
+            self.manifest = self.__read_manifest()
+            self.descriptions = pd.read_parquet(os.path.join(self.root_dir, "descriptions.parquet"))["description"].to_numpy(dtype=object)
+            trigrams = pd.read_parquet(os.path.join(self.root_dir, "trigrams.parquet"))
+            self.trigrams = trigrams["trigram"].to_numpy(dtype=np.int64)
+            self.trigram_desc_ids = trigrams["desc_id"].to_numpy(dtype=np.int64)
+            self.rows = pd.read_parquet(os.path.join(self.root_dir, "rows.parquet"))
+
+        self.__index_rows()
+        self.loaded = True
+
+    def __read_manifest(self):
+
+        if not os.path.exists(self.manifest_file):
+            return {}
+        with open(self.manifest_file, "r") as f:
+            return json.load(f)
+
+    def __index_rows(self):
+
+        # Start offset of every description's rows (rows are sorted by desc_id), plus plain arrays for the filters
+        self.row_offsets = np.searchsorted(self.rows["desc_id"].to_numpy(dtype=np.int64), np.arange(len(self.descriptions) + 1))
+        self.row_post_dates = pd.to_datetime(self.rows["Post Date"]).to_numpy()
+        self.row_amounts = self.rows["Amount Cents"].astype("float64").to_numpy()
+        # Accounts and income/expense are filtered as integer codes
+        self.row_account_codes, self.account_names = pd.factorize(self.rows["Account"])
+        self.row_income_or_expense_codes, self.income_or_expense_names = pd.factorize(self.rows["Income or Expense"])
+        # Results are gathered column by column from plain numpy arrays (much cheaper than .iloc on the whole frame)
+        self.row_columns = {col: self.rows[col].to_numpy(dtype=object) for col in ROW_COLUMNS if col not in ["Post Date", "Amount Cents"]}
+
+    def __save(self, descriptions_changed):
+
+        os.makedirs(self.root_dir, exist_ok=True)
+        if descriptions_changed:
+            pd.DataFrame({"description": self.descriptions}).to_parquet(os.path.join(self.root_dir, "descriptions.parquet"), index=False)
+            pd.DataFrame({"trigram": self.trigrams, "desc_id": self.trigram_desc_ids}).to_parquet(
+                os.path.join(self.root_dir, "trigrams.parquet"), index=False)
+        self.rows.to_parquet(os.path.join(self.root_dir, "rows.parquet"), index=False)
+        self.__save_manifest()
+
+    def __save_manifest(self):
+
+        tmp_file = self.manifest_file + ".tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(tmp_file, self.manifest_file)
+
+    def update(self, txns_df):
+        """
+        Brings the index up to date with the latest transactions (the combined output of refresh_income_and_expense_data).
+
+        Args:
+            txns_df (pd.DataFrame): Transactions with Post Date, Transaction Date, Account, Amount Cents, Description, Type,
+                Income or Expense and Description Category columns
+
+        Returns:
+            dict: Number of new descriptions indexed and rows in the index
+        """
+        # A refresh usually hands over the same transactions as last time, so check that before loading the index or parsing
+        # and sorting anything (row order doesn't matter, hence the sum of the row hashes)
+        input_fingerprint = str(pd.util.hash_pandas_object(txns_df[ROW_COLUMNS], index=False).sum())
+        manifest = self.manifest if self.loaded else self.__read_manifest()
+        if manifest.get("input_fingerprint") == input_fingerprint:
+            return {"new_descriptions": 0, "rows": manifest["rows"]}
+
+        self.__load()
+
+        rows = txns_df[ROW_COLUMNS].reset_index(drop=True)
+        rows = rows.assign(**{
+            "Post Date": pd.to_datetime(rows["Post Date"], format="%m/%d/%Y", errors="coerce"),
+            "Transaction Date": rows["Transaction Date"].fillna("").astype(str),
+            "Account": rows["Account"].fillna("").astype(str),
+            "Description": rows["Description"].fillna("").astype(str),
+            "Type": rows["Type"].fillna("").astype(str),
+            "Income or Expense": rows["Income or Expense"].fillna("").astype(str),
+            "Description Category": rows["Description Category"].fillna("").astype(str)
+        })
+        normalized = rows["Description"].str.upper()
+
+        # Only descriptions that have never been seen get tokenized
+        vocabulary = pd.Index(self.descriptions)
+        new_descriptions = pd.unique(normalized[~normalized.isin(vocabulary)])
+        if len(new_descriptions):
+            first_new_id = len(self.descriptions)
+            new_trigrams, new_desc_ids = [], []
+            for desc_id, desc in enumerate(new_descriptions, start=first_new_id):
+                desc_trigrams = encode_trigrams(desc)
+                new_trigrams.extend(desc_trigrams)
+                new_desc_ids.extend([desc_id] * len(desc_trigrams))
+
+            self.descriptions = np.concatenate([self.descriptions, np.array(new_descriptions, dtype=object)])
+            trigrams = np.concatenate([self.trigrams, np.array(new_trigrams, dtype=np.int64)])
+            trigram_desc_ids = np.concatenate([self.trigram_desc_ids, np.array(new_desc_ids, dtype=np.int64)])
+            order = np.lexsort((trigram_desc_ids, trigrams))
+            self.trigrams, self.trigram_desc_ids = trigrams[order], trigram_desc_ids[order]
+            vocabulary = pd.Index(self.descriptions)
+
+        # The rows are replaced wholesale (they're cheap to rewrite), but skip the write if nothing changed
+        rows["desc_id"] = vocabulary.get_indexer(normalized)
+        rows = rows.sort_values(["desc_id", "Post Date"], ascending=[True, False], kind="stable").reset_index(drop=True)
+        rows_fingerprint = str(pd.util.hash_pandas_object(rows, index=False).sum())
+        rows_changed = rows_fingerprint != self.manifest.get("rows_fingerprint")
+
+        self.manifest["input_fingerprint"] = input_fingerprint
+        if len(new_descriptions) or rows_changed:
+            self.rows = rows
+            self.__index_rows()
+            self.manifest.update({
+                "updated_at": datetime.now().isoformat(timespec="seconds"),
+                "descriptions": len(self.descriptions),
+                "rows": len(self.rows),
+                "rows_fingerprint": rows_fingerprint
+            })
+            self.__save(descriptions_changed=bool(len(new_descriptions)))
+        else:
+            self.__save_manifest()
+
+        return {"new_descriptions": len(new_descriptions), "rows": len(self.rows)}
+
+    def __matching_desc_ids(self, text):
+
+        # Description ids whose description contains the (normalized) text
+        text = normalize_description(text)
+        if not text:
+            return np.arange(len(self.descriptions))
+
+        if len(text) < 3:
+            # Too short for trigrams - scan the distinct descriptions (still far fewer than the rows)
+            return np.flatnonzero(pd.Series(self.descriptions, dtype=object).str.contains(text, regex=False).to_numpy())
+
+        # Intersect the posting lists of the text's trigrams, rarest first
+        postings = []
+        for trigram in encode_trigrams(text):
+            start, end = np.searchsorted(self.trigrams, [trigram, trigram + 1])
+            postings.append(self.trigram_desc_ids[start:end])
+        postings.sort(key=len)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            if not len(candidates):
+                break
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+
+        # Trigrams can all be present without the text being a substring, so verify the (few) candidates
+        return np.array([desc_id for desc_id in candidates if text in self.descriptions[desc_id]], dtype=np.int64)
+
+    def __row_positions(self, desc_ids):
+
+        # Rows of each description are one contiguous slice, so gather the slices without scanning every row
+        starts = self.row_offsets[desc_ids]
+        lengths = self.row_offsets[desc_ids + 1] - starts
+        if not lengths.sum():
+            return np.array([], dtype=np.int64)
+        slice_starts = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+        return slice_starts + np.arange(lengths.sum())
+
+    def search(self, query="", start=None, end=None, min_amount=None, max_amount=None, accounts=None, income_or_expense=None, limit=None):
+        """
+        Transactions whose description contains every (whitespace separated) term of the query, case-insensitive.
+
+        Args:
+            query (str): Search terms (empty matches everything)
+            start, end: Post Date range (inclusive), anything pd.Timestamp accepts
+            min_amount, max_amount (float): Amount range in dollars (inclusive)
+            accounts (list): Only these accounts
+            income_or_expense (str): Only "Income" or only "Expense"
+            limit (int): Maximum number of rows to return
+
+        Returns:
+            pd.DataFrame: Matching transactions (newest first) with the amount in dollars
+        """
+        self.__load()
+
+        terms = str(query).split()
+        desc_ids = np.arange(len(self.descriptions))
+        for term in terms:
+            desc_ids = np.intersect1d(desc_ids, self.__matching_desc_ids(term), assume_unique=True)
+        positions = self.__row_positions(desc_ids) if terms else np.arange(len(self.rows))
+
+        keep = np.ones(len(positions), dtype=bool)
+        if start is not None:
+            keep &= self.row_post_dates[positions] >= pd.Timestamp(start).to_datetime64()
+        if end is not None:
+            keep &= self.row_post_dates[positions] <= pd.Timestamp(end).to_datetime64()
+        if min_amount is not None:
+            keep &= self.row_amounts[positions] >= round(min_amount * 100)
+        if max_amount is not None:
+            keep &= self.row_amounts[positions] <= round(max_amount * 100)
+        if accounts is not None:
+            keep &= np.isin(self.row_account_codes[positions], self.account_names.get_indexer(list(accounts)))
+        if income_or_expense is not None:
+            keep &= self.row_income_or_expense_codes[positions] == self.income_or_expense_names.get_indexer([income_or_expense])[0]
+        positions = positions[keep]
+
+        # Newest first
+        positions = positions[np.argsort(self.row_post_dates[positions], kind="stable")[::-1]]
+        if limit is not None:
+            positions = positions[:limit]
+
+        return pd.DataFrame({
+            col: self.row_post_dates[positions] if col == "Post Date"
+            else self.row_amounts[positions] / 100 if col == "Amount Cents"
+            else self.row_columns[col][positions]
+            for col in ROW_COLUMNS
+        }).rename(columns={"Amount Cents": "Amount"})
+
+    def uncategorized(self, min_count=1, limit=None):
+        """
+        Descriptions that no Table1 rule or manual override categorized, most frequent first.
+
+        Returns:
+            pd.DataFrame: Description, Count, Total (dollars), Accounts, First Seen and Last Seen
+        """
+        self.__load()
+
+        uncategorized = self.rows[self.rows["Description Category"] == ""]
+        report = uncategorized.groupby(uncategorized["Description"].str.upper()).agg(**{
+            "Count": ("Amount Cents", "size"),
+            "Total Cents": ("Amount Cents", "sum"),
+            "Accounts": ("Account", lambda accounts: ", ".join(sorted(set(accounts)))),
+            "First Seen": ("Post Date", "min"),
+            "Last Seen": ("Post Date", "max")
+        }).rename_axis("Description").reset_index()
+
+        report = report[report["Count"] >= min_count].sort_values(["Count", "Last Seen"], ascending=False)
+        report.insert(2, "Total", report["Total Cents"].astype("float64") / 100)
+        report = report.drop(columns="Total Cents").reset_index(drop=True)
+        return report.head(limit) if limit is not None else report
+
+    def matching_rules(self, description, category_rules, exclude_rules=None):
+        """
+        Which rules would match a description: every matching Table1 rule in order (the first one wins) and every
+        matching Table2 exclude.
+
+        Args:
+            description (str): The description to check
+            category_rules (dict): Description substring -> category (Table1)
+            exclude_rules (list): Description substrings that exclude a transaction (Table2)
+
+        Returns:
+            dict: category (the winning category, "" if none), category_rules (matching (substring, category) pairs in
+                order) and excludes (matching Table2 substrings)
+        """
+        normalized = normalize_description(description)
+        matches = [(substring, category) for substring, category in (category_rules or {}).items() if normalize_description(substring) in normalized]
+        # Table2 excludes are applied to the raw description, so they're case-sensitive
+        excludes = [exclude for exclude in (exclude_rules or []) if exclude and exclude in str(description)]
+
+        return {
+            "category": matches[0][1] if matches else "",
+            "category_rules": matches,
+            "excludes": excludes
+        }
+
+    def rule_coverage(self, category_rules):
+        """
+        For every Table1 rule (in order): the distinct descriptions and transactions it matches, and how many of those it
+        actually wins (an earlier rule takes the rest). Rules that win nothing are dead or shadowed.
+
+        Returns:
+            pd.DataFrame: Rule, Category, Descriptions Matched, Rows Matched, Descriptions Won, Rows Won
+        """
+        self.__load()
+
+        rows_per_desc = np.diff(self.row_offsets)
+        claimed = np.zeros(len(self.descriptions), dtype=bool)
+        coverage = []
+        for substring, category in (category_rules or {}).items():
+            desc_ids = self.__matching_desc_ids(substring) if substring else np.array([], dtype=np.int64)
+            won = desc_ids[~claimed[desc_ids]]
+            claimed[won] = True
+            coverage.append({
+                "Rule": substring,
+                "Category": category,
+                "Descriptions Matched": len(desc_ids),
+                "Rows Matched": int(rows_per_desc[desc_ids].sum()),
+                "Descriptions Won": len(won),
+                "Rows Won": int(rows_per_desc[won].sum())
+            })
+
+        return pd.DataFrame(coverage, columns=["Rule", "Category", "Descriptions Matched", "Rows Matched", "Descriptions Won", "Rows Won"])
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Search the transaction history and report uncategorized descriptions.")
+    parser.add_argument("action", choices=["search", "uncategorized"])
+    parser.add_argument("query", nargs="?", default="")
+    parser.add_argument("--index", required=True, help="Index folder (<pipeline data folder>/transaction_search/<workbook>)")
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--min-amount", type=float, default=None)
+    parser.add_argument("--max-amount", type=float, default=None)
+    parser.add_argument("--account", action="append", default=None, help="Only this account (repeatable)")
+    parser.add_argument("--min-count", type=int, default=1, help="Minimum occurrences (uncategorized)")
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    index = TransactionSearchIndex(args.index)
+    if not os.path.exists(index.manifest_file):
+        print(f"No transaction search index in {args.index} - run refresh_income_and_expense_data first")
+        sys.exit(1)
+
+    with pd.option_context("display.max_rows", None, "display.width", 200, "display.max_colwidth", 80):
+        if args.action == "search":
+            print(index.search(args.query, args.start, args.end, args.min_amount, args.max_amount, args.account, limit=args.limit).to_string(index=False))
+        else:
+            print(index.uncategorized(args.min_count, args.limit).to_string(index=False))
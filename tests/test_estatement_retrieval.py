@@ -0,0 +1,122 @@
+
+# Runs the eStatement workers against locally served statement page fixtures (tests/fixtures/estatements).
+# Needs Chrome and selenium; set CHROMEDRIVER to the chromedriver path to run (a visible Chrome is used, since printing
+# to PDF with --kiosk-printing doesn't work headless).
+
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs
+import functools
+import threading
+import json
+import sys
+import os
+
+import pytest
+
+pytest.importorskip("selenium")
+if not os.environ.get("CHROMEDRIVER"):
+    pytest.skip("CHROMEDRIVER isn't set", allow_module_level=True)
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+from estatement_retrieval import EStatementCheckpoint, download_estatements_for_accounts
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "estatements")
+
+class StatementPagesHandler(SimpleHTTPRequestHandler):
+
+    # Set by the fixture: the statements listed per account, and how many more times a statement should fail to load
+    statements = {}
+    failures_left = {}
+    lock = threading.Lock()
+
+    def do_GET(self):
+
+        url = urlparse(self.path)
+        if url.path == "/statements.js":
+            return self.send_text("var STATEMENTS = " + json.dumps(self.statements) + ";", "application/javascript")
+
+        if url.path == "/statement.html":
+            query = parse_qs(url.query)
+            key = (query["account"][0], query["date"][0])
+            with self.lock:
+                fail = self.failures_left.get(key, 0) > 0
+                if fail:
+                    self.failures_left[key] -= 1
+            if fail:
+                self.path = "/statement_unavailable.html"
+
+        return super().do_GET()
+
+    def send_text(self, text, content_type):
+
+        body = text.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def statement_site():
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(StatementPagesHandler, directory=FIXTURES_DIR))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/index.html"
+    server.shutdown()
+    server.server_close()
+
+def run_workers(tmp_path, base_url, checkpoint, export_folders):
+
+    # One worker per account, side by side, each with its own download folder
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [
+            executor.submit(
+                download_estatements_for_accounts, [account_name], export_folders, ("user", "password"),
+                os.environ["CHROMEDRIVER"], str(tmp_path / f"worker_{worker_id}"), checkpoint, base_url,
+                retries=1, download_timeout=15, page_timeout=2
+            )
+            for worker_id, account_name in enumerate(export_folders)
+        ]
+        summary = {}
+        for future in futures:
+            summary.update(future.result())
+    return summary
+
+def test_skips_existing_retries_failures_and_resumes(tmp_path, statement_site):
+
+    export_folders = {account_name: tmp_path / account_name for account_name in ["Checking", "Visa"]}
+    for export_folder in export_folders.values():
+        export_folder.mkdir()
+    export_folders = {account_name: str(export_folder) for account_name, export_folder in export_folders.items()}
+
+    # Checking 01/01 is already downloaded, Visa 02/01 fails once (retried) and Visa 03/01 fails on every attempt
+    open(os.path.join(export_folders["Checking"], "01-01-2026.pdf"), "wb").close()
+    StatementPagesHandler.statements = {"Checking": ["01/01/2026", "02/01/2026"], "Visa": ["01/01/2026", "02/01/2026", "03/01/2026"]}
+    StatementPagesHandler.failures_left = {("Visa", "02/01/2026"): 1, ("Visa", "03/01/2026"): 2}
+
+    checkpoint_file = str(tmp_path / "checkpoint.json")
+    summary = run_workers(tmp_path, statement_site, EStatementCheckpoint(checkpoint_file), export_folders)
+
+    assert (summary["Checking"]["downloaded"], summary["Checking"]["skipped"]) == (1, 1)
+    assert summary["Visa"]["downloaded"] == 2
+    assert [statement_date for statement_date, _ in summary["Visa"]["failed"]] == ["03/01/2026"]
+    assert sorted(os.listdir(export_folders["Visa"])) == ["01-01-2026.pdf", "02-01-2026.pdf"]
+    with open(checkpoint_file) as f:
+        assert sorted(json.load(f)["statements"]["Visa"]) == ["01-01-2026.pdf", "02-01-2026.pdf"]
+
+    # Resume: a statement recorded in the checkpoint is skipped even if its file was moved away, the failed statement is
+    # retried, and a statement published since the interrupted run is picked up
+    os.remove(os.path.join(export_folders["Visa"], "01-01-2026.pdf"))
+    StatementPagesHandler.statements["Checking"].append("03/01/2026")
+    summary = run_workers(tmp_path, statement_site, EStatementCheckpoint(checkpoint_file), export_folders)
+
+    assert (summary["Checking"]["downloaded"], summary["Checking"]["skipped"]) == (1, 2)
+    assert (summary["Visa"]["downloaded"], summary["Visa"]["skipped"]) == (1, 2)
+    assert not summary["Checking"]["failed"] and not summary["Visa"]["failed"]
+    assert sorted(os.listdir(export_folders["Checking"])) == ["01-01-2026.pdf", "02-01-2026.pdf", "03-01-2026.pdf"]
+    assert sorted(os.listdir(export_folders["Visa"])) == ["02-01-2026.pdf", "03-01-2026.pdf"]